@@ -8,6 +8,9 @@ pip install -r requirements.txt
 # Apply database migrations
 python manage.py migrate
 
+# Recompute materialized scores and ranks (also hourly via the render.yaml cron)
+python manage.py recompute_scores
+
 # Create default industries
 echo "Creating default industries..."
 python manage.py create_industries
@@ -2,7 +2,8 @@ from django.contrib import admin
 from .models import (
     Contact, Industry, UserProfile, Startup, InvestorProfile, Event, EventRegistration, FounderProfile,
     InvestorAccessRequest, StartupFinancials, StartupPeople, StartupNews, StartupTechnology, PrivateDataAccess,
-    ConnectionRequest, Conversation, Message, Notification, MeetRequest
+    ConnectionRequest, Conversation, Message, Notification, MeetRequest, StartupScore,
+    InvestorStartupMatch
 )
 
 @admin.register(Contact)
@@ -64,6 +65,19 @@ class StartupAdmin(admin.ModelAdmin):
     list_editable = ['featured', 'is_fundraising']
     readonly_fields = ['created_at', 'updated_at']
 
+@admin.register(StartupScore)
+class StartupScoreAdmin(admin.ModelAdmin):
+    list_display = ['startup', 'growth_score', 'heat_score', 'combined_score', 'cb_rank', 'ranking_percentile', 'computed_at']
+    search_fields = ['startup__company_name']
+    readonly_fields = ['computed_at']
+
+@admin.register(InvestorStartupMatch)
+class InvestorStartupMatchAdmin(admin.ModelAdmin):
+    list_display = ['investor', 'startup', 'score', 'stage_match', 'ticket_match', 'computed_at']
+    search_fields = ['investor__fund_name', 'startup__company_name']
+    list_filter = ['stage_match', 'ticket_match']
+    readonly_fields = ['computed_at']
+
 # ===========================================
 # ADMIN PARA SISTEMA DE INFORMACIÓN PRIVADA
 # ===========================================
@@ -0,0 +1,280 @@
+"""
+Índice de prefijos en memoria para el autocompletado (typeahead)
+Indexa Startup.company_name de las startups públicas y, de los inversores
+activos, InvestorProfile.fund_name más el nombre de su titular, en una lista
+ordenada de (término normalizado, clave); cada consulta es una búsqueda
+binaria + recorrido del rango del prefijo, sin ir a la base de datos. El
+endpoint es anónimo: no se indexan cuentas de usuario, solo perfiles públicos.
+
+El índice es por proceso: se construye al primer uso, se actualiza
+incrementalmente desde los signals y, pasados AUTOCOMPLETE_MAX_AGE segundos,
+se reconstruye en un hilo de fondo (uno a la vez) mientras se sigue sirviendo
+el índice anterior, para recoger cambios hechos en otros procesos.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+
+from django.db import connection
+from django.urls import reverse
+
+from .models import InvestorProfile, Startup, StartupScore
+
+
+logger = logging.getLogger('core')
+
+AUTOCOMPLETE_MAX_AGE = 60 * 5
+AUTOCOMPLETE_DEFAULT_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+AUTOCOMPLETE_KINDS = ('startup', 'investor')
+
+
+def normalize(text):
+    """Minúsculas y sin acentos ("Café" -> "cafe")"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def _terms(label):
+    """El nombre completo y cada palabra, para que "ventures" encuentre "Acme Ventures" """
+    name = normalize(label)
+    if not name:
+        return set()
+    return {name, *name.split()}
+
+
+def _entry_terms(entry):
+    """Términos de la etiqueta y de los alias (p. ej. el titular de un fondo)"""
+    terms = _terms(entry['label'])
+    for alias in entry.get('aliases', ()):
+        terms |= _terms(alias)
+    return tuple(terms)
+
+
+class PrefixIndex:
+    """
+    Lista ordenada de (término, clave) + lista de claves ordenada por score.
+    Los prefijos con pocas coincidencias recorren su rango de términos; los
+    muy amplios ("a", "co") recorren las entradas por score hasta juntar el
+    top-k, que con muchas coincidencias aparece enseguida.
+    """
+
+    # Tamaño de rango a partir del cual conviene recorrer por score
+    BROAD_PREFIX_RANGE = 2000
+
+    def __init__(self):
+        self._terms = []
+        self._by_score = []
+        self._entries = {}
+        self._entry_terms = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _score_key(key, entry):
+        return (-entry['score'], entry['label'], key)
+
+    def load(self, entries):
+        """Reemplaza el contenido completo (construcción inicial)"""
+        entry_terms = {key: _entry_terms(entry) for key, entry in entries.items()}
+        terms = sorted((term, key) for key, key_terms in entry_terms.items() for term in key_terms)
+        by_score = sorted(self._score_key(key, entry) for key, entry in entries.items())
+        with self._lock:
+            self._entries = dict(entries)
+            self._entry_terms = entry_terms
+            self._terms = terms
+            self._by_score = by_score
+            self.built_at = time.monotonic()
+
+    @staticmethod
+    def _discard(items, item):
+        position = bisect.bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+
+    def _remove_key(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for term in self._entry_terms.pop(key):
+            self._discard(self._terms, (term, key))
+        self._discard(self._by_score, self._score_key(key, entry))
+
+    def upsert(self, key, entry):
+        with self._lock:
+            self._remove_key(key)
+            self._entries[key] = entry
+            self._entry_terms[key] = _entry_terms(entry)
+            for term in self._entry_terms[key]:
+                bisect.insort(self._terms, (term, key))
+            bisect.insort(self._by_score, self._score_key(key, entry))
+
+    def remove(self, key):
+        with self._lock:
+            self._remove_key(key)
+
+    def search(self, prefix, limit, kinds=None):
+        """Top-`limit` entradas cuyo algún término empieza por `prefix`, por score"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            terms = self._terms
+            start = bisect.bisect_left(terms, (prefix,))
+            end = bisect.bisect_left(terms, (prefix + '\U0010ffff',), lo=start)
+
+            if end - start <= self.BROAD_PREFIX_RANGE:
+                keys = {key for _, key in terms[start:end] if kinds is None or key[0] in kinds}
+                entries = [self._entries[key] for key in keys]
+                return heapq.nlargest(
+                    limit, entries, key=lambda entry: (entry['score'], entry['label'])
+                )
+
+            results = []
+            for _, _, key in self._by_score:
+                if kinds is not None and key[0] not in kinds:
+                    continue
+                if any(term.startswith(prefix) for term in self._entry_terms[key]):
+                    results.append(self._entries[key])
+                    if len(results) == limit:
+                        break
+            return results
+
+
+_index = PrefixIndex()
+
+
+def _full_name(first_name, last_name):
+    return f'{first_name} {last_name}'.strip()
+
+
+def _startup_entry(startup_id, company_name, tagline, combined_score):
+    return {
+        'kind': 'startup',
+        'id': startup_id,
+        'label': company_name,
+        'sublabel': tagline or '',
+        'url': reverse('core:startup_profile', args=[startup_id]),
+        'score': combined_score or 0,
+    }
+
+
+def _investor_entry(investor_id, fund_name, investor_type, portfolio_count, owner_name=''):
+    return {
+        'kind': 'investor',
+        'id': investor_id,
+        'label': fund_name,
+        'sublabel': dict(InvestorProfile.INVESTOR_TYPES).get(investor_type, ''),
+        'url': reverse('core:investor_detail', args=[investor_id]),
+        'score': portfolio_count or 0,
+        # El nombre del titular (visible en su perfil público) también encuentra el fondo
+        'aliases': [owner_name] if owner_name else [],
+    }
+
+
+def build_index():
+    """Construye el índice completo (dos queries)"""
+    entries = {}
+
+    scores = Startup.objects.filter(is_public=True).values_list(
+        'id', 'company_name', 'tagline', 'score__combined_score'
+    )
+    for startup_id, company_name, tagline, combined_score in scores:
+        entries[('startup', startup_id)] = _startup_entry(startup_id, company_name, tagline, combined_score)
+
+    investors = InvestorProfile.objects.filter(is_active=True, user__is_active=True).values_list(
+        'id', 'fund_name', 'investor_type', 'portfolio_companies_count', 'user__first_name', 'user__last_name'
+    )
+    for investor_id, fund_name, investor_type, portfolio_count, first_name, last_name in investors:
+        entries[('investor', investor_id)] = _investor_entry(
+            investor_id, fund_name, investor_type, portfolio_count, _full_name(first_name, last_name)
+        )
+
+    _index.load(entries)
+    return len(entries)
+
+
+_build_lock = threading.Lock()
+
+
+def _rebuild_in_background():
+    try:
+        build_index()
+    except Exception as e:
+        logger.error(f"Autocomplete index rebuild failed: {str(e)}", exc_info=True)
+    finally:
+        connection.close()
+        _build_lock.release()
+
+
+def get_index():
+    """
+    Índice del proceso. Solo la primera construcción bloquea (y una sola vez,
+    bajo lock); los refrescos por antigüedad corren en un hilo de fondo y las
+    consultas siguen usando el índice actual hasta que el nuevo lo reemplaza.
+    """
+    if _index.built_at is None:
+        with _build_lock:
+            if _index.built_at is None:
+                build_index()
+    elif time.monotonic() - _index.built_at > AUTOCOMPLETE_MAX_AGE and _build_lock.acquire(blocking=False):
+        threading.Thread(target=_rebuild_in_background, daemon=True).start()
+    return _index
+
+
+def autocomplete(query, limit=AUTOCOMPLETE_DEFAULT_LIMIT, kinds=None):
+    """Sugerencias para `query` ordenadas por score/popularidad"""
+    limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+    return get_index().search(query, limit, kinds=kinds)
+
+
+# Actualizaciones incrementales (llamadas desde signals; no hacen nada si el
+# índice aún no se construyó en este proceso)
+
+def update_startup(startup):
+    if _index.built_at is None:
+        return
+    key = ('startup', startup.pk)
+    if not startup.is_public:
+        _index.remove(key)
+        return
+    combined_score = StartupScore.objects.filter(startup_id=startup.pk).values_list(
+        'combined_score', flat=True
+    ).first()
+    _index.upsert(key, _startup_entry(startup.pk, startup.company_name, startup.tagline, combined_score))
+
+
+def update_investor(investor):
+    if _index.built_at is None:
+        return
+    key = ('investor', investor.pk)
+    user = investor.user
+    if not investor.is_active or not user.is_active:
+        _index.remove(key)
+        return
+    _index.upsert(key, _investor_entry(
+        investor.pk, investor.fund_name, investor.investor_type, investor.portfolio_companies_count,
+        _full_name(user.first_name, user.last_name),
+    ))
+
+
+def update_user(user):
+    """El nombre y el estado del usuario afectan la entrada de su fondo"""
+    if _index.built_at is None:
+        return
+    investor = InvestorProfile.objects.filter(user_id=user.pk).first()
+    if investor is not None:
+        investor.user = user
+        update_investor(investor)
+
+
+def remove_entry(kind, pk):
+    if _index.built_at is None:
+        return
+    _index.remove((kind, pk))
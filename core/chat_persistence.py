@@ -0,0 +1,260 @@
+"""
+Escritura diferida (write-behind) de los mensajes del chat
+ChatConsumer no espera al INSERT: el mensaje recibe su clave de idempotencia
+(client_id) y su timestamp al llegar, se difunde al grupo de inmediato y
+queda en un buffer en memoria. Una tarea de fondo vacía el buffer en lotes
+con bulk_create (mensajes + notificaciones, agrupadas por conversación) y
+avisa al grupo de cada conversación con 'messages_persisted' (id y seq definitivos), que sirve de
+confirmación al remitente y de cursor de reanudación para todos.
+
+Entrega al menos una vez:
+- un lote que falla vuelve al buffer y se reintenta con backoff
+- tras FLUSH_MAX_FAILURES fallos seguidos el lote se reintenta mensaje por
+  mensaje: los que fallan por sus datos (p. ej. la conversación ya no existe)
+  se descartan, se registran en el log y se rechazan al remitente
+  ('messages_failed'); si la base está caída todo vuelve al buffer
+- el buffer tiene un máximo (CHAT_MAX_PENDING): lleno, enqueue rechaza los
+  mensajes nuevos (WriteBehindFull) en lugar de crecer sin límite
+- el cliente reenvía los mensajes sin confirmar al reconectar, con el mismo
+  client_id; los duplicados se descartan en el buffer y en la base (UNIQUE)
+
+El buffer es por proceso: con varios workers ASGI, un resume atendido por
+otro worker no ve lo que aún no se guardó. El resume solo cubre lo ya
+persistido (seq en la base) y el cliente solo avanza su cursor sin huecos:
+si una confirmación posterior salta un seq, vuelve a pedir resume.
+"""
+import asyncio
+import logging
+import uuid
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, transaction
+from django.utils import timezone
+
+from .models import Message, Notification, message_preview
+from .notification_service import save_notifications
+
+
+logger = logging.getLogger('core')
+
+FLUSH_INTERVAL = getattr(settings, 'CHAT_FLUSH_INTERVAL', 0.25)
+FLUSH_BATCH_SIZE = getattr(settings, 'CHAT_FLUSH_BATCH_SIZE', 200)
+FLUSH_MAX_FAILURES = getattr(settings, 'CHAT_FLUSH_MAX_FAILURES', 3)
+MAX_PENDING = getattr(settings, 'CHAT_MAX_PENDING', 5000)
+MAX_RETRY_DELAY = 5.0
+
+# Errores de conexión: la base no responde, el mensaje no tiene la culpa
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+class WriteBehindFull(Exception):
+    """El buffer llegó a MAX_PENDING (la base no está vaciando): reintentar más tarde"""
+
+
+def parse_client_id(value):
+    """UUID enviado por el cliente como clave de idempotencia (None si no es válido)"""
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def persist_messages(messages):
+    """
+    Inserta un lote de mensajes (y sus notificaciones) en una transacción.
+    Los client_id que ya existen en la base se omiten. Retorna
+    {client_id: (id, seq)} para todos los mensajes del lote.
+    """
+    keys = [message.client_id for message in messages]
+    with transaction.atomic():
+        persisted = {
+            client_id: (pk, seq)
+            for client_id, pk, seq in Message.objects.filter(client_id__in=keys).values_list('client_id', 'id', 'seq')
+        }
+        new_messages = [message for message in messages if message.client_id not in persisted]
+        if new_messages:
+            Message.objects.bulk_create(new_messages)
+            save_notifications([
+                Notification(
+                    user=message.conversation.get_other_participant(message.sender),
+                    message=message,
+                    conversation=message.conversation,
+                    kind='message',
+                    content=f"{message.sender.get_full_name()}: {message_preview(message.content)}",
+                )
+                for message in new_messages
+            ])
+    persisted.update((message.client_id, (message.pk, message.seq)) for message in new_messages)
+    return persisted
+
+
+class MessageWriteBehind:
+    """Buffer de mensajes pendientes y tarea de flush (uno por proceso/event loop)"""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, batch_size=FLUSH_BATCH_SIZE,
+                 max_pending=MAX_PENDING, max_failures=FLUSH_MAX_FAILURES):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_failures = max_failures
+        self._pending = []
+        self._pending_keys = set()
+        self._task = None
+        self._wake = None
+        self._flush_lock = None
+        self._loop = None
+        self._failures = 0
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._task = None
+            self._wake = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+        return loop
+
+    def enqueue(self, conversation, sender, content, client_id=None):
+        """
+        Agrega un mensaje al buffer con id (client_id) y timestamp asignados.
+        Retorna el Message sin guardar, o None si ese client_id ya está pendiente.
+        Lanza WriteBehindFull si el buffer está lleno (backpressure).
+        """
+        loop = self._bind_loop()
+        client_id = client_id or uuid.uuid4()
+        if client_id in self._pending_keys:
+            return None
+        if len(self._pending) >= self.max_pending:
+            raise WriteBehindFull()
+
+        message = Message(
+            conversation=conversation,
+            sender=sender,
+            content=content,
+            client_id=client_id,
+            created_at=timezone.now(),
+        )
+        self._pending.append(message)
+        self._pending_keys.add(client_id)
+
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+        return message
+
+    async def _run(self):
+        """Vacía el buffer cada flush_interval (o antes si se llena un lote)"""
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not await self.flush():
+                # Backoff exponencial mientras la base no responda
+                await asyncio.sleep(min(MAX_RETRY_DELAY, self.flush_interval * 2 ** self._failures))
+
+    async def flush(self):
+        """Persiste un lote del buffer. Retorna False si falló (el lote se reencola)."""
+        if self._flush_lock is None:
+            return True
+        async with self._flush_lock:
+            batch = self._pending[:self.batch_size]
+            if not batch:
+                return True
+            del self._pending[:len(batch)]
+            if self._failures >= self.max_failures:
+                return await self._flush_isolated(batch)
+            try:
+                persisted = await database_sync_to_async(persist_messages)(batch)
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Chat write-behind flush failed ({len(batch)} messages): {str(e)}", exc_info=True)
+                self._pending[:0] = batch
+                return False
+
+            self._failures = 0
+            self._pending_keys.difference_update(message.client_id for message in batch)
+
+        await self._acknowledge(batch, persisted)
+        return True
+
+    async def _flush_isolated(self, batch):
+        """
+        Reintento mensaje por mensaje tras varios fallos del lote: los mensajes
+        con errores de datos se descartan (dead letter en el log) y se rechazan;
+        ante un error de conexión todo lo no guardado vuelve al buffer.
+        Se llama con _flush_lock tomado.
+        """
+        persisted = {}
+        failed = []
+        requeued = False
+        for index, message in enumerate(batch):
+            try:
+                persisted.update(await database_sync_to_async(persist_messages)([message]))
+            except TRANSIENT_ERRORS as e:
+                self._failures += 1
+                logger.error(f"Chat write-behind: database unavailable ({str(e)})")
+                self._pending[:0] = batch[index:]
+                batch = batch[:index]
+                requeued = True
+                break
+            except Exception as e:
+                logger.error(
+                    f"Chat write-behind dead letter: conversation={message.conversation_id} "
+                    f"sender={message.sender_id} client_id={message.client_id} "
+                    f"content={message_preview(message.content)!r}: {str(e)}",
+                    exc_info=True,
+                )
+                failed.append(message)
+        else:
+            self._failures = 0
+
+        saved = [message for message in batch if message.client_id in persisted]
+        self._pending_keys.difference_update(message.client_id for message in saved + failed)
+        await self._acknowledge(saved, persisted)
+        await self._reject(failed)
+        return not requeued
+
+    async def flush_all(self):
+        """Persiste todo lo pendiente (al cerrar un socket o en un apagado ordenado)"""
+        while self._pending:
+            if not await self.flush():
+                return False
+        return True
+
+    async def _acknowledge(self, batch, persisted):
+        """Un evento por conversación con el id y seq definitivos de cada mensaje"""
+        by_conversation = {}
+        for message in batch:
+            message_id, seq = persisted[message.client_id]
+            by_conversation.setdefault(message.conversation_id, []).append({
+                'client_id': str(message.client_id),
+                'message_id': message_id,
+                'seq': seq,
+            })
+        channel_layer = get_channel_layer()
+        for conversation_id, messages in by_conversation.items():
+            await channel_layer.group_send(f'chat_{conversation_id}', {
+                'type': 'messages_persisted',
+                'messages': messages,
+            })
+
+
+    async def _reject(self, messages):
+        """Rechazo (nack) de los mensajes descartados, para que el remitente deje de reenviarlos"""
+        by_conversation = {}
+        for message in messages:
+            by_conversation.setdefault(message.conversation_id, []).append(str(message.client_id))
+        channel_layer = get_channel_layer()
+        for conversation_id, client_ids in by_conversation.items():
+            await channel_layer.group_send(f'chat_{conversation_id}', {
+                'type': 'messages_failed',
+                'client_ids': client_ids,
+            })
+
+
+write_behind = MessageWriteBehind()
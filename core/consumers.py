@@ -1,14 +1,104 @@
 """
 WebSocket Consumers para chat en tiempo real
 """
+import asyncio
 import json
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Conversation, Message, Notification
+from django.db.models import Q
+from .chat_persistence import WriteBehindFull, parse_client_id, write_behind
+from .models import Conversation, Message, UserProfile
+from .notification_service import get_unread_count, notification_group_name
+from .presence_service import presence
 
 User = get_user_model()
 
+# Máximo de mensajes por lote de reanudación; si hay más, el cliente recarga el historial
+RESUME_MAX_MESSAGES = 200
+
+# Indicador de escritura: como máximo una transición publicada por ventana,
+# y un "está escribiendo" sin refresco se apaga solo pasado el TTL
+TYPING_WINDOW = getattr(settings, 'CHAT_TYPING_WINDOW', 1.0)
+TYPING_TTL = getattr(settings, 'CHAT_TYPING_TTL', 6.0)
+
+
+class TypingCoalescer:
+    """
+    Estado de escritura de un socket. Los eventos 'typing' solo cambian el
+    estado deseado; al channel layer se publica únicamente cuando difiere
+    del último publicado, con al menos `window` segundos entre publicaciones
+    (lo que cambie dentro de la ventana se publica al cerrarla, si sigue
+    siendo distinto). Sin refresco durante `ttl` segundos pasa a False.
+    """
+
+    def __init__(self, publish, window=TYPING_WINDOW, ttl=TYPING_TTL):
+        self.publish = publish
+        self.window = window
+        self.ttl = ttl
+        self.desired = False
+        self.published = False
+        self._last_publish = None
+        self._deferred = None
+        self._expiry = None
+        self._task = None
+
+    async def update(self, is_typing):
+        self.desired = bool(is_typing)
+        self._cancel_expiry()
+        if self.desired:
+            self._expiry = asyncio.get_running_loop().call_later(self.ttl, self._expire)
+        await self._maybe_publish()
+
+    def reset(self):
+        """El estado quedó implícito (p. ej. se envió el mensaje): sin publicar nada"""
+        self.desired = self.published = False
+        self._cancel_expiry()
+        self._cancel_deferred()
+
+    async def close(self):
+        """Al desconectar: apagar el indicador si quedó encendido"""
+        self._cancel_expiry()
+        self._cancel_deferred()
+        if self.published:
+            self.desired = self.published = False
+            await self.publish(False)
+
+    async def _maybe_publish(self):
+        if self.desired == self.published:
+            self._cancel_deferred()
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._last_publish is not None and now - self._last_publish < self.window:
+            if self._deferred is None:
+                self._deferred = loop.call_later(self._last_publish + self.window - now, self._flush_deferred)
+            return
+        self.published = self.desired
+        self._last_publish = now
+        await self.publish(self.published)
+
+    def _flush_deferred(self):
+        self._deferred = None
+        self._task = asyncio.ensure_future(self._maybe_publish())
+
+    def _expire(self):
+        self._expiry = None
+        self.desired = False
+        self._task = asyncio.ensure_future(self._maybe_publish())
+
+    def _cancel_expiry(self):
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+
+    def _cancel_deferred(self):
+        if self._deferred is not None:
+            self._deferred.cancel()
+            self._deferred = None
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """
@@ -17,6 +107,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
     - Envío y recepción de mensajes
     - Indicador de "está escribiendo"
     - Notificaciones de lectura
+    - Presencia (online/offline) con heartbeat
     """
     
     async def connect(self):
@@ -30,45 +121,55 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
+        # Conversación, otro participante y avatares se cargan una sola vez por socket
+        if not await self.load_conversation_state():
+            await self.close()
+            return
+        
         # Unirse al grupo de la conversación
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
         
+        # Cambios de presencia del otro participante (un grupo por usuario)
+        await self.channel_layer.group_add(
+            presence_group_name(self.other_user.id),
+            self.channel_name
+        )
+        
+        self.typing = TypingCoalescer(self.publish_typing)
+        
         await self.accept()
         
-        # Notificar que el usuario se conectó
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'user_status',
-                'user_id': self.user.id,
-                'status': 'online',
-                'username': self.user.get_full_name()
-            }
-        )
+        # Estado actual del otro participante, solo para este socket
+        await self.send_other_user_status()
+        
+        # Solo la primera conexión del usuario (pestaña/dispositivo) se difunde
+        if await sync_to_async(presence.connect)(self.user.id, self.channel_name):
+            await self.broadcast_presence('online')
     
     async def disconnect(self, close_code):
         """Cuando un usuario se desconecta"""
-        # Verificar que el usuario esté autenticado antes de notificar
-        if self.user.is_authenticated:
-            # Notificar que el usuario se desconectó
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'user_status',
-                    'user_id': self.user.id,
-                    'status': 'offline',
-                    'username': self.user.get_full_name()
-                }
+        # Solo notificar si la conexión llegó a autorizarse
+        if getattr(self, 'conversation', None) is not None:
+            await self.channel_layer.group_discard(
+                presence_group_name(self.other_user.id),
+                self.channel_name
             )
+            # Solo la última conexión del usuario lo deja offline
+            if await sync_to_async(presence.disconnect)(self.user.id, self.channel_name):
+                await self.broadcast_presence('offline')
+            await self.typing.close()
         
         # Salir del grupo
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        
+        # No dejar mensajes de este socket solo en memoria
+        await write_behind.flush_all()
     
     async def receive(self, text_data):
         """Recibir mensaje del WebSocket"""
@@ -76,14 +177,25 @@ class ChatConsumer(AsyncWebsocketConsumer):
         message_type = data.get('type')
         
         if message_type == 'chat_message':
-            # Mensaje de chat
+            # Mensaje de chat: id y timestamp se asignan ya; el INSERT es diferido
             content = data['message']
+            client_id = parse_client_id(data.get('client_id'))
+            try:
+                message = write_behind.enqueue(self.conversation, self.user, content, client_id=client_id)
+            except WriteBehindFull:
+                # Backpressure: la base no está vaciando el buffer; el cliente reintenta
+                await self.send(text_data=json.dumps({
+                    'type': 'message_rejected',
+                    'client_id': str(client_id) if client_id else None,
+                    'reason': 'busy',
+                }))
+                return
+            if message is None:
+                # Reenvío de un mensaje que todavía está en el buffer
+                return
             
-            # Guardar mensaje en la base de datos
-            message = await self.save_message(content)
-            
-            # Obtener avatar URL de forma asíncrona
-            avatar_url = await self.get_user_avatar()
+            # El mensaje cierra la racha de escritura; el receptor oculta el indicador al recibirlo
+            self.typing.reset()
             
             # Enviar mensaje a todos en el grupo
             await self.channel_layer.group_send(
@@ -91,32 +203,30 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 {
                     'type': 'chat_message',
                     'message': content,
-                    'message_id': message.id,
+                    'message_id': str(message.client_id),
                     'sender_id': self.user.id,
-                    'sender_name': self.user.get_full_name(),
+                    'sender_name': self.user_name,
                     'timestamp': message.created_at.strftime('%H:%M'),
-                    'avatar_url': avatar_url,
+                    'avatar_url': self.avatar_url,
                 }
             )
             
         elif message_type == 'typing':
-            # Indicador de "está escribiendo"
-            is_typing = data.get('is_typing', False)
-            
-            # Enviar a todos excepto al remitente
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'typing_indicator',
-                    'user_id': self.user.id,
-                    'username': self.user.get_full_name(),
-                    'is_typing': is_typing,
-                }
-            )
+            # Indicador de "está escribiendo" (se publica solo al cambiar, ver TypingCoalescer)
+            await self.typing.update(data.get('is_typing', False))
         
         elif message_type == 'mark_read':
             # Marcar mensajes como leídos
             await self.mark_messages_read()
+        
+        elif message_type == 'resume':
+            # Reconexión: enviar solo lo posterior al último seq que vio el cliente
+            await self.send_missed_messages(data.get('last_seq'))
+        
+        elif message_type == 'heartbeat':
+            # Renueva el TTL de esta conexión y refresca el estado del otro participante
+            await sync_to_async(presence.heartbeat)(self.user.id, self.channel_name)
+            await self.send_other_user_status()
     
     async def chat_message(self, event):
         """Enviar mensaje de chat al WebSocket"""
@@ -130,6 +240,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'avatar_url': event.get('avatar_url'),
         }))
     
+    async def messages_persisted(self, event):
+        """Mensajes ya guardados: id y seq definitivos (confirmación y cursor de reanudación)"""
+        await self.send(text_data=json.dumps({
+            'type': 'messages_persisted',
+            'messages': event['messages'],
+        }))
+    
+    async def messages_failed(self, event):
+        """Mensajes descartados por el write-behind (no se guardarán): rechazo al remitente"""
+        await self.send(text_data=json.dumps({
+            'type': 'messages_failed',
+            'client_ids': event['client_ids'],
+        }))
+    
     async def typing_indicator(self, event):
         """Enviar indicador de escritura al WebSocket"""
         # No enviar el indicador al usuario que está escribiendo
@@ -150,6 +274,29 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'status': event['status'],
         }))
     
+    async def publish_typing(self, is_typing):
+        """Enviar a todos excepto al remitente"""
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'typing_indicator',
+                'user_id': self.user.id,
+                'username': self.user_name,
+                'is_typing': is_typing,
+            }
+        )
+    
+    async def broadcast_presence(self, status):
+        await broadcast_presence(self.channel_layer, self.user.id, self.user_name, status)
+    
+    async def send_other_user_status(self):
+        online = await sync_to_async(presence.online_user_ids)([self.other_user.id])
+        await self.user_status({
+            'user_id': self.other_user.id,
+            'username': self.other_user.get_full_name(),
+            'status': 'online' if online else 'offline',
+        })
+    
     async def meet_started(self, event):
         """Enviar notificación de videollamada iniciada"""
         await self.send(text_data=json.dumps({
@@ -194,47 +341,191 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'conversation_id': event['conversation_id'],
         }))
     
+    async def send_missed_messages(self, last_seq):
+        """Un único lote compacto con los mensajes posteriores a last_seq"""
+        try:
+            last_seq = max(0, int(last_seq))
+        except (TypeError, ValueError):
+            return
+        # Lo que sigue en el buffer de este proceso todavía no tiene seq. Lo
+        # de otros workers llega después con 'messages_persisted': el cliente
+        # detecta el hueco de seq y vuelve a pedir resume desde su last_seq
+        await write_behind.flush_all()
+        messages, has_more = await self.get_messages_after(last_seq)
+        await self.send(text_data=json.dumps({
+            'type': 'resume_batch',
+            'messages': messages,
+            'last_seq': messages[-1]['seq'] if messages else last_seq,
+            'has_more': has_more,
+        }))
+    
+    async def participant_updated(self, event):
+        """Un participante cambió su nombre o avatar: recargar el estado cacheado"""
+        if event['user_id'] in (self.user.id, self.other_user.id):
+            await self.load_conversation_state()
+    
     @database_sync_to_async
-    def save_message(self, content):
-        """Guardar mensaje en la base de datos y crear notificación"""
-        conversation = Conversation.objects.get(id=self.conversation_id)
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=self.user,
-            content=content
-        )
+    def load_conversation_state(self):
+        """
+        Carga y autoriza la conversación una vez por conexión. Retorna False
+        si no existe o el usuario no participa en ella.
+        """
+        conversation = Conversation.objects.select_related(
+            'participant1', 'participant1__profile',
+            'participant2', 'participant2__profile',
+        ).filter(
+            Q(participant1=self.user) | Q(participant2=self.user),
+            id=self.conversation_id
+        ).first()
+        if conversation is None:
+            return False
         
-        # Crear notificación para el otro participante
-        recipient = conversation.get_other_participant(self.user)
-        if recipient:
-            # Limitar preview a 100 caracteres
-            preview = content if len(content) <= 100 else content[:97] + '...'
-            Notification.objects.create(
-                user=recipient,
-                message=message,
-                conversation=conversation,
-                content=f"{self.user.get_full_name()}: {preview}"
-            )
-        
-        return message
+        me = conversation.participant1 if conversation.participant1_id == self.user.id else conversation.participant2
+        self.conversation = conversation
+        self.other_user = conversation.get_other_participant(me)
+        self.user_name = me.get_full_name()
+        self.avatar_url = _avatar_url(me)
+        self.other_avatar_url = _avatar_url(self.other_user)
+        return True
+    
+    @database_sync_to_async
+    def get_messages_after(self, last_seq):
+        """Mensajes con seq > last_seq (índice único conversation+seq), como máximo RESUME_MAX_MESSAGES"""
+        rows = list(Message.objects.filter(
+            conversation_id=self.conversation_id,
+            seq__gt=last_seq
+        ).order_by('seq').values(
+            'id', 'seq', 'client_id', 'sender_id', 'content', 'created_at'
+        )[:RESUME_MAX_MESSAGES + 1])
+        names = {self.user.id: self.user_name, self.other_user.id: self.other_user.get_full_name()}
+        avatars = {self.user.id: self.avatar_url, self.other_user.id: self.other_avatar_url}
+        messages = [
+            {
+                'message_id': str(row['client_id'] or row['id']),
+                'id': row['id'],
+                'seq': row['seq'],
+                'sender_id': row['sender_id'],
+                'sender_name': names.get(row['sender_id'], ''),
+                'avatar_url': avatars.get(row['sender_id']),
+                'message': row['content'],
+                'timestamp': row['created_at'].strftime('%H:%M'),
+            }
+            for row in rows[:RESUME_MAX_MESSAGES]
+        ]
+        return messages, len(rows) > RESUME_MAX_MESSAGES
     
     @database_sync_to_async
     def mark_messages_read(self):
         """Marcar mensajes como leídos"""
-        conversation = Conversation.objects.get(id=self.conversation_id)
         Message.objects.filter(
-            conversation=conversation,
+            conversation_id=self.conversation_id,
             is_read=False
         ).exclude(
             sender=self.user
         ).update(is_read=True)
+        self.conversation.mark_as_read(self.user)
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Socket de notificaciones del usuario (uno por pestaña)
+    Al conectar recibe el contador de no leídas; después solo deltas
+    (notificaciones nuevas, agrupadas, leídas o eliminadas) publicados en su grupo,
+    cada uno con el contador resultante.
+    Está abierto en todas las páginas, así que también registra la presencia
+    (connect/heartbeat/disconnect): el usuario figura online aunque no tenga
+    un chat abierto.
+    """
     
-    @database_sync_to_async
-    def get_user_avatar(self):
-        """Obtener URL del avatar del usuario de forma asíncrona"""
+    async def connect(self):
+        self.user = self.scope['user']
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+        
+        self.group_name = notification_group_name(self.user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        
+        # Punto de partida (también corrige el badge tras una reconexión)
+        await self.send(text_data=json.dumps({
+            'type': 'notifications_sync',
+            'unread_count': await database_sync_to_async(get_unread_count)(self.user.id),
+        }))
+        
+        if await sync_to_async(presence.connect)(self.user.id, self.channel_name):
+            await broadcast_presence(self.channel_layer, self.user.id, self.user.get_full_name(), 'online')
+    
+    async def disconnect(self, close_code):
+        if getattr(self, 'group_name', None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            if await sync_to_async(presence.disconnect)(self.user.id, self.channel_name):
+                await broadcast_presence(self.channel_layer, self.user.id, self.user.get_full_name(), 'offline')
+    
+    async def receive(self, text_data):
         try:
-            if self.user.profile and self.user.profile.profile_image:
-                return self.user.profile.profile_image.url
-        except:
-            pass
-        return None
+            data = json.loads(text_data)
+        except json.JSONDecodeError:
+            return
+        if isinstance(data, dict) and data.get('type') == 'heartbeat':
+            await sync_to_async(presence.heartbeat)(self.user.id, self.channel_name)
+    
+    async def notifications_created(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'notifications_created',
+            'notifications': event['notifications'],
+            'unread_delta': event['unread_delta'],
+            'unread_count': event['unread_count'],
+        }))
+    
+    async def notifications_updated(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'notifications_updated',
+            'notifications': event['notifications'],
+            'unread_delta': event['unread_delta'],
+            'unread_count': event['unread_count'],
+        }))
+    
+    async def notifications_read(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'notifications_read',
+            'notification_ids': event['notification_ids'],
+            'unread_delta': event['unread_delta'],
+            'unread_count': event['unread_count'],
+        }))
+    
+    async def notifications_deleted(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'notifications_deleted',
+            'notification_ids': event['notification_ids'],
+            'unread_delta': event['unread_delta'],
+            'unread_count': event['unread_count'],
+        }))
+
+
+def presence_group_name(user_id):
+    """Grupo de los sockets interesados en la presencia de un usuario"""
+    return f'presence_{user_id}'
+
+
+async def broadcast_presence(channel_layer, user_id, username, status):
+    """Un único evento por transición, a los sockets que siguen a este usuario"""
+    await channel_layer.group_send(
+        presence_group_name(user_id),
+        {
+            'type': 'user_status',
+            'user_id': user_id,
+            'status': status,
+            'username': username,
+        }
+    )
+
+
+def _avatar_url(user):
+    """URL del avatar del usuario (None si no tiene perfil o imagen)"""
+    try:
+        if user.profile and user.profile.profile_image:
+            return user.profile.profile_image.url
+    except UserProfile.DoesNotExist:
+        pass
+    return None
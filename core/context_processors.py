@@ -1,20 +1,18 @@
 """
 Context processors para inyectar datos globales en todos los templates
 """
-from .models import Notification
+from .notification_service import get_unread_count
 
 
 def notifications_context(request):
     """
     Inyecta el contador de notificaciones no leídas en todos los templates
+    (contador cacheado: un cache get, sin SQL)
     """
     unread_count = 0
     
     if request.user.is_authenticated:
-        unread_count = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).count()
+        unread_count = get_unread_count(request.user.id)
     
     return {
         'unread_notifications_count': unread_count
@@ -0,0 +1,133 @@
+"""
+Paneles del dashboard cargados por HTMX
+El shell del dashboard solo resuelve el perfil; cada panel se pide como
+fragmento independiente (hx-trigger="load") y tiene su propia política de
+cache:
+- scope 'shared': el HTML es igual para todos los usuarios (una entrada)
+- scope 'user': el HTML depende del usuario (una entrada por usuario)
+- ttl: segundos en cache del servidor y max-age (privado) del navegador
+Un panel que falla se reporta por separado y no afecta al resto.
+"""
+from django.utils import timezone
+
+from .match_service import investor_match_counts, top_investors_for_startup, top_startups_for_investor
+from .models import InvestorProfile, Startup
+from .stats_service import get_ecosystem_snapshot
+
+
+def stats_panel(request, profile):
+    """Estadísticas globales del ecosistema (snapshot compartido)"""
+    return {'ecosystem_stats': get_ecosystem_snapshot()['stats']}
+
+
+def featured_panel(request, profile):
+    """Startups destacadas de la columna lateral"""
+    return {'recent_activity': {'recent_startups': get_ecosystem_snapshot()['recent_startups']}}
+
+
+def sidebar_panel(request, profile):
+    """Inversores activos y próximos eventos"""
+    snapshot = get_ecosystem_snapshot()
+    return {'recent_activity': {
+        'recent_investors': snapshot['featured_investors'],
+        'upcoming_events': snapshot['upcoming_events'],
+    }}
+
+
+def founder_panel(request, profile):
+    """Métricas de la startup del founder e inversores recomendados"""
+    try:
+        startup = Startup.objects.select_related('industry').get(founder=profile)
+    except Startup.DoesNotExist:
+        return {'needs_startup': True}
+
+    today = timezone.now().date()
+    return {
+        'startup': startup,
+        'startup_metrics': {
+            'funding_progress': (startup.total_funding_raised / startup.seeking_amount * 100) if startup.seeking_amount else 0,
+            'time_since_founded': (today - startup.founded_date).days if startup.founded_date else 0,
+            'years_since_founded': round((today - startup.founded_date).days / 365.25, 1) if startup.founded_date else 0,
+            'industry_rank': Startup.objects.filter(
+                industry=startup.industry,
+                total_funding_raised__gte=startup.total_funding_raised
+            ).count() if startup.industry else 0
+        },
+        'recommended_investors': top_investors_for_startup(startup, limit=8),
+        'similar_startups': list(Startup.objects.filter(
+            industry=startup.industry,
+            stage=startup.stage,
+            is_public=True
+        ).exclude(id=startup.id)[:5]) if startup.industry else []
+    }
+
+
+def investor_panel(request, profile):
+    """Deal flow del inversor desde el índice de matches"""
+    try:
+        investor = InvestorProfile.objects.select_related('user').get(user=request.user)
+    except InvestorProfile.DoesNotExist:
+        return {'needs_investor_profile': True}
+
+    snapshot = get_ecosystem_snapshot()
+    match_counts = investor_match_counts(investor)
+    return {
+        'investor': investor,
+        'ecosystem_stats': snapshot['stats'],
+        'deal_flow': {
+            'new_opportunities': top_startups_for_investor(investor, limit=8),
+            'total_matches': match_counts['total'],
+            'matching_stage': match_counts['matching_stage'],
+            'in_range': match_counts['in_range'],
+        },
+        'market_insights': {
+            'avg_valuation': snapshot['stats']['avg_valuation'],
+            'hot_industries': snapshot['trending_industries']
+        }
+    }
+
+
+def community_panel(request, profile):
+    """Descubrimiento para advisors y community members (igual para todos)"""
+    public_startups = Startup.objects.filter(is_public=True).select_related('industry')
+    return {
+        'discovery': {
+            'featured_startups': list(public_startups.filter(featured=True).order_by('-created_at')[:6]),
+            'top_funded': list(public_startups.filter(total_funding_raised__gt=0).order_by('-total_funding_raised')[:5]),
+            'recently_launched': get_ecosystem_snapshot()['recent_startups']
+        },
+        'network_opportunities': {
+            'active_investors': list(InvestorProfile.objects.filter(
+                is_active=True,
+                is_accepting_pitches=True
+            ).select_related('user').order_by('-fund_size')[:6]),
+            'growing_startups': list(public_startups.filter(
+                stage__in=['growth', 'scale']
+            ).order_by('-employees_count')[:6])
+        }
+    }
+
+
+DASHBOARD_PANELS = {
+    'stats': {'build': stats_panel, 'template': 'core/partials/dashboard_stats.html', 'scope': 'shared', 'ttl': 60},
+    'featured': {'build': featured_panel, 'template': 'core/partials/dashboard_featured.html', 'scope': 'shared', 'ttl': 60},
+    'sidebar': {'build': sidebar_panel, 'template': 'core/partials/dashboard_sidebar.html', 'scope': 'shared', 'ttl': 60},
+    'founder': {'build': founder_panel, 'template': 'core/dashboard_founder.html', 'scope': 'user', 'ttl': 30},
+    'investor': {'build': investor_panel, 'template': 'core/dashboard_investor.html', 'scope': 'user', 'ttl': 30},
+    'community': {'build': community_panel, 'template': 'core/dashboard_community.html', 'scope': 'shared', 'ttl': 300},
+}
+
+
+def role_panel(user_type):
+    """Panel principal según el tipo de usuario"""
+    if user_type in ('founder', 'investor'):
+        return user_type
+    return 'community'
+
+
+def panel_cache_key(name, user):
+    """Clave de cache del HTML renderizado de un panel"""
+    panel = DASHBOARD_PANELS[name]
+    if panel['scope'] == 'user':
+        return f'dashboard_panel:{name}:{user.pk}'
+    return f'dashboard_panel:{name}'
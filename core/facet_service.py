@@ -0,0 +1,151 @@
+"""
+Servicio de facetas del directorio de startups
+Calcula los conteos de todas las facetas (industria, etapa, etapa de
+ingresos, fundraising) con una sola query agrupada y los guarda en cache
+según el conjunto de filtros activos. Los conteos se invalidan cambiando
+la versión de cache cada vez que se guarda o elimina una startup.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Startup
+from .search_service import search_startups
+
+
+FACETS_CACHE_TIMEOUT = 60 * 10
+FACETS_VERSION_KEY = 'startup_facets:version'
+
+# Faceta -> columna agrupada
+FACET_FIELDS = {
+    'industry': 'industry_id',
+    'stage': 'stage',
+    'revenue_stage': 'revenue_stage',
+    'is_fundraising': 'is_fundraising',
+}
+
+FUNDRAISING_LABELS = {True: 'Levantando capital', False: 'No está levantando'}
+
+
+def parse_facet_filters(params):
+    """Extrae y valida los filtros de faceta de un QueryDict (valores inválidos se ignoran)"""
+    filters = {}
+
+    industry = params.get('industry')
+    if industry and industry.isdigit():
+        filters['industry'] = int(industry)
+
+    stage = params.get('stage')
+    if stage in dict(Startup.COMPANY_STAGES):
+        filters['stage'] = stage
+
+    revenue_stage = params.get('revenue_stage')
+    if revenue_stage in dict(Startup.REVENUE_STAGES):
+        filters['revenue_stage'] = revenue_stage
+
+    fundraising = params.get('is_fundraising')
+    if fundraising in ('1', '0'):
+        filters['is_fundraising'] = fundraising == '1'
+
+    return filters
+
+
+def apply_facet_filters(queryset, filters):
+    """Aplica los filtros de faceta a un queryset de Startup"""
+    return queryset.filter(**{FACET_FIELDS[name]: value for name, value in filters.items()})
+
+
+def _cache_version():
+    version = cache.get(FACETS_VERSION_KEY)
+    if version is None:
+        # Versión nueva (no reutiliza entradas de una versión expulsada del cache)
+        version = int(time.time() * 1000)
+        cache.add(FACETS_VERSION_KEY, version, None)
+        version = cache.get(FACETS_VERSION_KEY, version)
+    return version
+
+
+def _bump_version():
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError:
+        _cache_version()
+
+
+def invalidate_facets():
+    """
+    Invalida todos los conteos cacheados (llamado desde los signals de
+    Startup) al confirmar la transacción: antes, un request concurrente podía
+    recalcular con los datos previos al commit y cachearlos bajo la versión nueva
+    """
+    transaction.on_commit(_bump_version)
+
+
+def _cache_key(filters, search_query):
+    raw = json.dumps({'f': filters, 'q': search_query or ''}, sort_keys=True)
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'startup_facets:{_cache_version()}:{digest}'
+
+
+def _compute_facets(queryset, filters):
+    """
+    Una query agrupada por la combinación de todas las facetas; los conteos
+    de cada faceta se derivan en Python aplicando los filtros de las demás
+    (así cada opción muestra cuántos resultados tendría al seleccionarla).
+    """
+    columns = list(FACET_FIELDS.values())
+    rows = queryset.order_by().values(*columns, 'industry__name').annotate(count=Count('id'))
+
+    counts = {name: {} for name in FACET_FIELDS}
+    industry_names = {}
+    total = 0
+    for row in rows:
+        industry_names[row['industry_id']] = row['industry__name']
+        matches = {
+            name: name not in filters or row[column] == filters[name]
+            for name, column in FACET_FIELDS.items()
+        }
+        if all(matches.values()):
+            total += row['count']
+        for name, column in FACET_FIELDS.items():
+            # La faceta cuenta si el resto de filtros coincide
+            if all(match for other, match in matches.items() if other != name):
+                value = row[column]
+                counts[name][value] = counts[name].get(value, 0) + row['count']
+
+    labels = {
+        'industry': industry_names,
+        'stage': dict(Startup.COMPANY_STAGES),
+        'revenue_stage': dict(Startup.REVENUE_STAGES),
+        'is_fundraising': FUNDRAISING_LABELS,
+    }
+    facets = {}
+    for name, values in counts.items():
+        options = [
+            {'value': value, 'label': labels[name].get(value) or value, 'count': count}
+            for value, count in values.items()
+            if value is not None
+        ]
+        options.sort(key=lambda option: (-option['count'], str(option['label'])))
+        facets[name] = options
+    return {'total': total, 'facets': facets}
+
+
+def get_facet_counts(filters, search_query=None):
+    """
+    Conteos de todas las facetas para los filtros activos.
+    Retorna {'total': n, 'facets': {faceta: [{'value', 'label', 'count'}, ...]}}.
+    """
+    key = _cache_key(filters, search_query)
+    result = cache.get(key)
+    if result is None:
+        queryset = Startup.objects.filter(is_public=True)
+        if search_query:
+            queryset = Startup.objects.filter(pk__in=search_startups(queryset, search_query).values('pk'))
+        result = _compute_facets(queryset, filters)
+        cache.set(key, result, FACETS_CACHE_TIMEOUT)
+    return result
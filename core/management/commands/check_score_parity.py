@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Startup
+
+
+class Command(BaseCommand):
+    help = 'Verifica que los scores calculados en SQL (with_scores) coincidan con los de Python'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=500,
+            help='Número de startups aleatorias a comparar',
+        )
+
+    def handle(self, *args, **options):
+        """Compara growth/heat score de la anotación SQL contra los métodos del modelo"""
+        startups = (
+            Startup.objects.with_scores()
+            .select_related('industry')
+            .order_by('?')[:options['sample']]
+        )
+
+        checked = 0
+        mismatches = 0
+        for startup in startups:
+            checked += 1
+            expected = (startup.calculate_growth_score(), startup.calculate_heat_score())
+            actual = (startup.growth_score, startup.heat_score)
+            if expected != actual:
+                mismatches += 1
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'⚠️  {startup.company_name} (id {startup.id}): '
+                        f'Python {expected} != SQL {actual}'
+                    )
+                )
+
+        if mismatches:
+            raise CommandError(f'{mismatches} de {checked} startups con scores distintos')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {checked} startups verificadas: SQL y Python coinciden')
+        )
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core.match_service import rebuild_all_matches
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de matches inversor-startup (deal flow e inversores recomendados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Número de filas por cada bulk_create en InvestorStartupMatch',
+        )
+
+    def handle(self, *args, **options):
+        """Comando para recalcular todos los matches inversor-startup"""
+        started = time.monotonic()
+        self.stdout.write(self.style.SUCCESS('🚀 Reconstruyendo índice de matches...'))
+        total = rebuild_all_matches(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(f'🎉 {total} matches guardados en {elapsed:.2f}s')
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core.ranking_service import assign_ranks
+from core.score_engine import recompute_all_scores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula en bloque los scores (growth, heat, rank) de todas las startups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Número de filas por cada upsert en StartupScore',
+        )
+        parser.add_argument(
+            '--ranks-only',
+            action='store_true',
+            help='Solo reasignar CB Rank y percentil sin recalcular los scores',
+        )
+
+    def handle(self, *args, **options):
+        """Comando para recalcular los scores materializados de todas las startups"""
+        started = time.monotonic()
+        if options['ranks_only']:
+            self.stdout.write(self.style.SUCCESS('🚀 Reasignando ranking global de startups...'))
+            total = assign_ranks(batch_size=options['batch_size'])
+        else:
+            self.stdout.write(self.style.SUCCESS('🚀 Recalculando scores de startups...'))
+            total = recompute_all_scores(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(f'🎉 {total} startups recalculadas en {elapsed:.2f}s')
+        )
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core.notification_service import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Recalcula en la base los contadores cacheados de notificaciones no leídas'
+
+    def handle(self, *args, **options):
+        """Comando para corregir la deriva de los contadores (p. ej. desde un cron)"""
+        started = time.monotonic()
+        self.stdout.write(self.style.SUCCESS('🚀 Reconciliando contadores de notificaciones...'))
+        total = reconcile_unread_counts()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(f'🎉 {total} contadores actualizados en {elapsed:.2f}s')
+        )
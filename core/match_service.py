@@ -0,0 +1,172 @@
+"""
+Servicio de matching inversor-startup
+Precalcula la afinidad de cada par (inversor activo, startup pública que
+está levantando capital) y la guarda en InvestorStartupMatch. Los
+dashboards leen el top-N con una sola query por índice; el índice se
+actualiza incrementalmente cuando cambia un inversor o una startup.
+
+Puntaje (0-100):
+- Etapa: la etapa de la startup está en investment_stages (35)
+- Ticket: seeking_amount dentro de [min_investment, max_investment] (30)
+- Industria: la tesis/sweet spot del inversor menciona la industria (20)
+- Geografía: foco global (15); sin foco o foco regional puntúan menos
+  porque la startup no registra región
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import InvestorProfile, InvestorStartupMatch, Startup
+
+
+MATCH_MIN_SCORE = 40
+
+STAGE_POINTS = 35
+STAGE_UNSPECIFIED_POINTS = 15
+TICKET_POINTS = 30
+TICKET_UNKNOWN_POINTS = 10
+INDUSTRY_POINTS = 20
+GEO_POINTS = {'global': 15, None: 10}
+GEO_REGIONAL_POINTS = 5
+
+INVESTOR_MATCH_FIELDS = [
+    'id', 'investment_stages', 'min_investment', 'max_investment',
+    'geographic_focus', 'thesis', 'sweet_spot',
+]
+STARTUP_MATCH_FIELDS = ['id', 'stage', 'seeking_amount', 'industry__name']
+
+# Campos del modelo que afectan el puntaje o la elegibilidad: guardar otros
+# campos (vistas, descripción, last_login...) no recalcula los matches
+STARTUP_MATCH_INPUTS = ('stage', 'seeking_amount', 'industry', 'is_public', 'is_fundraising')
+INVESTOR_MATCH_INPUTS = (
+    'investment_stages', 'min_investment', 'max_investment',
+    'geographic_focus', 'thesis', 'sweet_spot', 'is_active',
+)
+
+
+def _ticket_match(investor, seeking_amount):
+    """True/False si se puede evaluar el ticket; None si falta información"""
+    minimum, maximum = investor['min_investment'], investor['max_investment']
+    if seeking_amount is None or (minimum is None and maximum is None):
+        return None
+    return (minimum is None or seeking_amount >= minimum) and (maximum is None or seeking_amount <= maximum)
+
+
+def score_pair(investor, startup):
+    """
+    Puntaje de afinidad entre un inversor y una startup (dicts con
+    INVESTOR_MATCH_FIELDS / STARTUP_MATCH_FIELDS).
+    Retorna (score, stage_match, ticket_match).
+    """
+    stages = investor['investment_stages'] or []
+    stage_match = startup['stage'] in stages
+    if stage_match:
+        score = STAGE_POINTS
+    else:
+        score = 0 if stages else STAGE_UNSPECIFIED_POINTS
+
+    ticket_match = _ticket_match(investor, startup['seeking_amount'])
+    if ticket_match:
+        score += TICKET_POINTS
+    elif ticket_match is None:
+        score += TICKET_UNKNOWN_POINTS
+
+    industry = (startup['industry__name'] or '').lower()
+    if industry and industry in investor['focus_text']:
+        score += INDUSTRY_POINTS
+
+    score += GEO_POINTS.get(investor['geographic_focus'], GEO_REGIONAL_POINTS)
+    return score, stage_match, bool(ticket_match)
+
+
+def _investor_rows(queryset):
+    rows = list(queryset.values(*INVESTOR_MATCH_FIELDS))
+    for row in rows:
+        row['focus_text'] = f"{row['thesis']} {row['sweet_spot']}".lower()
+    return rows
+
+
+def _matchable_investors():
+    return InvestorProfile.objects.filter(is_active=True)
+
+
+def _matchable_startups():
+    return Startup.objects.filter(is_public=True, is_fundraising=True)
+
+
+def _build_matches(investors, startups):
+    matches = []
+    for investor in investors:
+        for startup in startups:
+            score, stage_match, ticket_match = score_pair(investor, startup)
+            if score >= MATCH_MIN_SCORE:
+                matches.append(InvestorStartupMatch(
+                    investor_id=investor['id'],
+                    startup_id=startup['id'],
+                    score=score,
+                    stage_match=stage_match,
+                    ticket_match=ticket_match,
+                ))
+    return matches
+
+
+def refresh_startup_matches(startup):
+    """Recalcula los matches de una startup contra todos los inversores activos"""
+    with transaction.atomic():
+        InvestorStartupMatch.objects.filter(startup_id=startup.pk).delete()
+        startups = list(_matchable_startups().filter(pk=startup.pk).values(*STARTUP_MATCH_FIELDS))
+        if not startups:
+            return 0
+        matches = _build_matches(_investor_rows(_matchable_investors()), startups)
+        InvestorStartupMatch.objects.bulk_create(matches)
+    return len(matches)
+
+
+def refresh_investor_matches(investor):
+    """Recalcula los matches de un inversor contra todas las startups en fundraising"""
+    with transaction.atomic():
+        InvestorStartupMatch.objects.filter(investor_id=investor.pk).delete()
+        investors = _investor_rows(_matchable_investors().filter(pk=investor.pk))
+        if not investors:
+            return 0
+        matches = _build_matches(investors, list(_matchable_startups().values(*STARTUP_MATCH_FIELDS)))
+        InvestorStartupMatch.objects.bulk_create(matches)
+    return len(matches)
+
+
+def rebuild_all_matches(batch_size=2000):
+    """Reconstruye el índice completo. Retorna el número de matches guardados."""
+    investors = _investor_rows(_matchable_investors())
+    startups = list(_matchable_startups().values(*STARTUP_MATCH_FIELDS))
+    total = 0
+    with transaction.atomic():
+        InvestorStartupMatch.objects.all().delete()
+        for investor in investors:
+            matches = _build_matches([investor], startups)
+            InvestorStartupMatch.objects.bulk_create(matches, batch_size=batch_size)
+            total += len(matches)
+    return total
+
+
+def top_startups_for_investor(investor, limit=8):
+    """Deal flow: mejores startups para un inversor (una query por índice)"""
+    matches = InvestorStartupMatch.objects.filter(investor=investor).select_related(
+        'startup', 'startup__industry'
+    ).order_by('-score', '-startup__created_at')[:limit]
+    return [match.startup for match in matches]
+
+
+def top_investors_for_startup(startup, limit=8):
+    """Inversores recomendados para una startup (una query por índice)"""
+    matches = InvestorStartupMatch.objects.filter(
+        startup=startup, investor__is_accepting_pitches=True
+    ).select_related('investor', 'investor__user').order_by('-score', '-investor__fund_size')[:limit]
+    return [match.investor for match in matches]
+
+
+def investor_match_counts(investor):
+    """Conteos del deal flow (total, por etapa, por ticket) en una sola query"""
+    return InvestorStartupMatch.objects.filter(investor=investor).aggregate(
+        total=Count('pk'),
+        matching_stage=Count('pk', filter=Q(stage_match=True)),
+        in_range=Count('pk', filter=Q(ticket_match=True)),
+    )
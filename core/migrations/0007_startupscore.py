@@ -0,0 +1,30 @@
+# Generated by Django 4.2.20 on 2026-10-17 21:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_meetrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StartupScore',
+            fields=[
+                ('startup', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='core.startup')),
+                ('growth_score', models.PositiveSmallIntegerField(default=0)),
+                ('heat_score', models.PositiveSmallIntegerField(default=0)),
+                ('combined_score', models.FloatField(default=0)),
+                ('cb_rank', models.PositiveIntegerField(blank=True, null=True)),
+                ('ranking_percentile', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Startup Score',
+                'indexes': [models.Index(fields=['-growth_score'], name='core_startu_growth__eddfd5_idx'), models.Index(fields=['-heat_score'], name='core_startu_heat_sc_136821_idx'), models.Index(fields=['-combined_score'], name='core_startu_combine_f7b604_idx'), models.Index(fields=['cb_rank'], name='core_startu_cb_rank_08aea4_idx')],
+            },
+        ),
+    ]
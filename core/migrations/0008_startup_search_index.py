@@ -0,0 +1,54 @@
+# Generated by Django 4.2.20 on 2026-10-17 21:52
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """Índice GIN + backfill del tsvector en PostgreSQL, tabla FTS5 en SQLite"""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX core_startup_search_gin ON core_startup USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE core_startup SET search_vector = "
+            "setweight(to_tsvector('simple', coalesce(company_name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(tagline, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS core_startup_fts "
+            "USING fts5(company_name, tagline, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_startup_fts (rowid, company_name, tagline, description) "
+            "SELECT id, company_name, tagline, description FROM core_startup"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS core_startup_search_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS core_startup_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_startupscore"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="startup",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
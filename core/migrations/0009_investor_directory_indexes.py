@@ -0,0 +1,78 @@
+# Generated by Django 4.2.20 on 2026-10-17 21:59
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+def create_investor_search_index(apps, schema_editor):
+    """Índice GIN + backfill del tsvector en PostgreSQL, tabla FTS5 en SQLite"""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX core_investorprofile_search_gin "
+            "ON core_investorprofile USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE core_investorprofile AS i SET search_vector = "
+            "setweight(to_tsvector('simple', coalesce(i.fund_name, '')), 'A') || "
+            "setweight(to_tsvector('simple', u.first_name || ' ' || u.last_name), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(i.thesis, '')), 'B') "
+            "FROM auth_user AS u WHERE u.id = i.user_id"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS core_investorprofile_fts "
+            "USING fts5(fund_name, full_name, thesis, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_investorprofile_fts (rowid, fund_name, full_name, thesis) "
+            "SELECT i.id, i.fund_name, u.first_name || ' ' || u.last_name, i.thesis "
+            "FROM core_investorprofile AS i JOIN auth_user AS u ON u.id = i.user_id"
+        )
+
+
+def drop_investor_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS core_investorprofile_search_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS core_investorprofile_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_startup_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="investorprofile",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investorprofile",
+            index=models.Index(
+                fields=["is_active", "-created_at"],
+                name="core_invest_is_acti_700b67_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investorprofile",
+            index=models.Index(
+                fields=["investor_type", "is_active"],
+                name="core_invest_investo_55caec_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="investorprofile",
+            index=models.Index(
+                fields=["geographic_focus", "is_active"],
+                name="core_invest_geograp_4c2a96_idx",
+            ),
+        ),
+        migrations.RunPython(create_investor_search_index, drop_investor_search_index),
+    ]
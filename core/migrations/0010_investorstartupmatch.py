@@ -0,0 +1,63 @@
+# Generated by Django 4.2.20 on 2026-10-17 22:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_investor_directory_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvestorStartupMatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.PositiveSmallIntegerField(default=0)),
+                ("stage_match", models.BooleanField(default=False)),
+                ("ticket_match", models.BooleanField(default=False)),
+                ("computed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "investor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="startup_matches",
+                        to="core.investorprofile",
+                    ),
+                ),
+                (
+                    "startup",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="investor_matches",
+                        to="core.startup",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Investor-Startup Match",
+                "verbose_name_plural": "Investor-Startup Matches",
+                "indexes": [
+                    models.Index(
+                        fields=["investor", "-score"],
+                        name="core_invest_investo_de8e62_idx",
+                    ),
+                    models.Index(
+                        fields=["startup", "-score"],
+                        name="core_invest_startup_81c92f_idx",
+                    ),
+                ],
+                "unique_together": {("investor", "startup")},
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.20 on 2026-10-17 22:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+PREVIEW_LENGTH = 100
+
+
+def backfill_conversation_summary(apps, schema_editor):
+    """Último mensaje y contadores de no leídos a partir de los mensajes existentes"""
+    Conversation = apps.get_model("core", "Conversation")
+    Message = apps.get_model("core", "Message")
+    for conversation in Conversation.objects.iterator():
+        messages = Message.objects.filter(conversation_id=conversation.pk)
+        last = messages.order_by("-created_at", "-id").first()
+        if last is None:
+            continue
+        preview = last.content
+        if len(preview) > PREVIEW_LENGTH:
+            preview = preview[: PREVIEW_LENGTH - 3] + "..."
+
+        def unread(user_id, last_read):
+            pending = messages.exclude(sender_id=user_id)
+            if last_read:
+                pending = pending.filter(created_at__gt=last_read)
+            return pending.count()
+
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message_id=last.pk,
+            last_message_sender_id=last.sender_id,
+            last_message_preview=preview,
+            last_message_at=last.created_at,
+            p1_unread_count=unread(conversation.participant1_id, conversation.p1_last_read),
+            p2_unread_count=unread(conversation.participant2_id, conversation.p2_last_read),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0010_investorstartupmatch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="core.message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_preview",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_sender",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="p1_unread_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="p2_unread_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_conversation_summary, migrations.RunPython.noop),
+    ]
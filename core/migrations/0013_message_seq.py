@@ -0,0 +1,44 @@
+# Generated by Django 4.2.20 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+def backfill_message_seq(apps, schema_editor):
+    """Numera los mensajes existentes de cada conversación por (created_at, id)"""
+    Conversation = apps.get_model("core", "Conversation")
+    Message = apps.get_model("core", "Message")
+    for conversation_id in Conversation.objects.values_list("id", flat=True).iterator():
+        messages = list(
+            Message.objects.filter(conversation_id=conversation_id).order_by("created_at", "id").only("id")
+        )
+        for seq, message in enumerate(messages, start=1):
+            message.seq = seq
+        Message.objects.bulk_update(messages, ["seq"], batch_size=500)
+        Conversation.objects.filter(pk=conversation_id).update(last_seq=len(messages))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_message_write_behind"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="last_seq",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="seq",
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_message_seq, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="message",
+            constraint=models.UniqueConstraint(
+                fields=("conversation", "seq"), name="unique_message_seq"
+            ),
+        ),
+    ]
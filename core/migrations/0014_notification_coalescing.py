@@ -0,0 +1,87 @@
+# Generated by Django 4.2.20 on 2026-10-17 22:22
+
+from django.db import migrations, models
+
+
+# Textos con que las vistas creaban las notificaciones de videollamada
+# (antes de existir el campo kind): "<nombre> ha ..."
+MEET_CONTENT_KINDS = [
+    ("ha solicitado una videollamada", "meet_request"),
+    ("ha iniciado una videollamada", "meet_started"),
+    ("ha aceptado tu solicitud de videollamada", "meet_accepted"),
+    ("ha rechazado tu solicitud de videollamada", "meet_rejected"),
+]
+
+
+def coalesce_unread_notifications(apps, schema_editor):
+    """
+    Infiere el tipo de las notificaciones existentes (mensaje por la FK,
+    videollamadas por su texto) y agrupa las no leídas de una misma
+    conversación y tipo en la más reciente, antes del índice único. Las que
+    quedan como 'general' no se agrupan, así no se pierde su contenido.
+    """
+    Notification = apps.get_model("core", "Notification")
+    Notification.objects.filter(message__isnull=False).update(kind="message")
+    for text, kind in MEET_CONTENT_KINDS:
+        Notification.objects.filter(message__isnull=True, content__contains=text).update(kind=kind)
+
+    groups = (
+        Notification.objects.filter(is_read=False, conversation__isnull=False)
+        .exclude(kind="general")
+        .values("user_id", "conversation_id", "kind")
+        .annotate(total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for group in groups.iterator():
+        ids = list(
+            Notification.objects.filter(
+                is_read=False,
+                user_id=group["user_id"],
+                conversation_id=group["conversation_id"],
+                kind=group["kind"],
+            )
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+        Notification.objects.filter(pk=ids[0]).update(count=len(ids))
+        Notification.objects.filter(pk__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_message_seq"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="count",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("message", "Mensaje"),
+                    ("meet_request", "Solicitud de videollamada"),
+                    ("meet_started", "Videollamada iniciada"),
+                    ("meet_accepted", "Videollamada aceptada"),
+                    ("meet_rejected", "Videollamada rechazada"),
+                    ("general", "General"),
+                ],
+                default="general",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(coalesce_unread_notifications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="notification",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_read", False), models.Q(("kind", "general"), _negated=True)),
+                fields=("user", "conversation", "kind"),
+                name="unique_unread_notification",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.20 on 2026-10-17 23:02
+
+from django.db import migrations, models
+
+
+def backfill_startup_scores(apps, schema_editor):
+    """
+    Una fila de StartupScore por startup (el directorio ordena con join
+    interno sobre esa tabla). Las faltantes quedan en 0 y sin rank hasta la
+    pasada de recompute_scores (build.sh y el cron de render.yaml).
+    """
+    Startup = apps.get_model("core", "Startup")
+    StartupScore = apps.get_model("core", "StartupScore")
+    missing = Startup.objects.filter(score__isnull=True).values_list("id", flat=True)
+    StartupScore.objects.bulk_create(
+        [StartupScore(startup_id=startup_id) for startup_id in missing.iterator()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_notification_coalescing"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_startup_scores, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="startupscore",
+            name="core_startu_growth__eddfd5_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="startupscore",
+            name="core_startu_heat_sc_136821_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="startupscore",
+            name="core_startu_cb_rank_08aea4_idx",
+        ),
+        migrations.AddIndex(
+            model_name="startupscore",
+            index=models.Index(
+                fields=["growth_score", "startup"],
+                name="core_startu_growth__6690c3_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="startupscore",
+            index=models.Index(
+                fields=["heat_score", "startup"], name="core_startu_heat_sc_07795e_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="startupscore",
+            index=models.Index(
+                fields=["cb_rank", "startup"], name="core_startu_cb_rank_e03daa_idx"
+            ),
+        ),
+    ]
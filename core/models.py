@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest, Least
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 import uuid
 
 # MODELOS CORE PARA LA PLATAFORMA STARTUP-INVESTOR
@@ -151,6 +154,121 @@ class Event(models.Model):
         from django.utils import timezone
         return timezone.now().date() > self.date
 
+# QUERYSET DE STARTUPS CON SCORES EN SQL
+class StartupQuerySet(models.QuerySet):
+    """
+    Expresiones SQL equivalentes a calculate_growth_score() y
+    calculate_heat_score() para ordenar/paginar en la base de datos.
+    """
+    
+    @staticmethod
+    def _points(*thresholds, default=0):
+        """Case/When a partir de pares (condición, puntos), evaluados en orden"""
+        return models.Case(
+            *[models.When(condition, then=models.Value(points)) for condition, points in thresholds],
+            default=models.Value(default),
+            output_field=models.IntegerField(),
+        )
+    
+    @classmethod
+    def profile_completeness_expression(cls):
+        """Factor 5 del Growth Score: completitud del perfil (0-15 puntos)"""
+        Q = models.Q
+        expression = models.Value(0, output_field=models.IntegerField())
+        for field in ['description', 'website', 'business_model', 'problem_statement', 'solution_description']:
+            expression = expression + cls._points((~Q(**{field: ''}), 2))
+        expression = expression + cls._points((Q(logo__isnull=False) & ~Q(logo=''), 2))
+        expression = expression + cls._points((Q(industry__isnull=False), 2))
+        expression = expression + cls._points((Q(founded_date__isnull=False), 1))
+        return expression
+    
+    def growth_score_expression(self):
+        """Growth Score (0-100) como expresión SQL"""
+        Q = models.Q
+        stage = self._points(*[
+            (Q(stage=stage), points) for stage, points in self.model.STAGE_GROWTH_SCORES.items()
+        ])
+        revenue = self._points(
+            (Q(monthly_revenue__gte=100000), 25),
+            (Q(monthly_revenue__gte=50000), 22),
+            (Q(monthly_revenue__gte=10000), 18),
+            (Q(monthly_revenue__gte=1000), 12),
+            (Q(monthly_revenue__gt=0), 8),
+        )
+        funding = self._points(
+            (Q(total_funding_raised__gte=10000000), 20),
+            (Q(total_funding_raised__gte=5000000), 18),
+            (Q(total_funding_raised__gte=1000000), 15),
+            (Q(total_funding_raised__gte=100000), 10),
+            (Q(total_funding_raised__gt=0), 5),
+        )
+        employees = self._points(
+            (Q(employees_count__gte=100), 15),
+            (Q(employees_count__gte=50), 13),
+            (Q(employees_count__gte=20), 11),
+            (Q(employees_count__gte=10), 8),
+            (Q(employees_count__gte=5), 5),
+            (Q(employees_count__gt=0) | Q(employees_count__lt=0), 2),
+        )
+        return Least(
+            stage + revenue + funding + employees + self.profile_completeness_expression(),
+            models.Value(100),
+        )
+    
+    def heat_score_expression(self, now=None):
+        """Heat Score (0-100) como expresión SQL, evaluado respecto a `now`"""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        Q = models.Q
+        now = now or timezone.now()
+        
+        # (now - updated_at).days <= N  <=>  updated_at > now - (N + 1) días
+        recency = self._points(
+            (Q(updated_at__isnull=True), 0),
+            (Q(updated_at__gt=now - timedelta(days=8)), 30),
+            (Q(updated_at__gt=now - timedelta(days=31)), 20),
+            (Q(updated_at__gt=now - timedelta(days=91)), 10),
+            default=5,
+        )
+        fundraising = self._points(
+            (Q(is_fundraising=True), 25),
+            (Q(seeking_amount__gt=0) | Q(seeking_amount__lt=0), 15),
+        )
+        revenue = self._points(
+            (Q(monthly_revenue__gte=10000), 25),
+            (Q(monthly_revenue__gte=1000), 20),
+            (Q(monthly_revenue__gt=0), 15),
+        )
+        # Coincidencia por substring (sensible a mayúsculas) como en Python
+        trending_ids = [
+            industry_id for industry_id, name in Industry.objects.values_list('id', 'name')
+            if any(trend in name for trend in self.model.TRENDING_INDUSTRIES)
+        ]
+        industry = self._points(
+            (Q(industry_id__in=trending_ids), 20),
+            (Q(industry__isnull=False), 10),
+        )
+        return Least(
+            recency + fundraising + revenue + industry,
+            models.Value(100),
+        )
+    
+    def with_scores(self, now=None):
+        """Anota growth_score, heat_score y combined_score calculados en SQL"""
+        from .score_service import GROWTH_WEIGHT, HEAT_WEIGHT
+        
+        return self.annotate(
+            growth_score=self.growth_score_expression(),
+            heat_score=self.heat_score_expression(now=now),
+        ).annotate(
+            combined_score=models.ExpressionWrapper(
+                models.F('growth_score') * GROWTH_WEIGHT + models.F('heat_score') * HEAT_WEIGHT,
+                output_field=models.FloatField(),
+            )
+        )
+
+
 # MODELO DE STARTUP COMPLETO
 class Startup(models.Model):
     """Modelo principal para startups en la plataforma"""
@@ -172,6 +290,28 @@ class Startup(models.Model):
         ('scale_revenue', 'Scale Revenue ($100K+ MRR)'),
     ]
     
+    # Puntos de Growth Score por etapa (0-25)
+    STAGE_GROWTH_SCORES = {
+        'idea': 5,
+        'prototype': 10,
+        'mvp': 15,
+        'early_traction': 20,
+        'growth': 25,
+        'scale': 22,  # Slightly lower as growth might be slowing
+        'exit': 18    # Company might be winding down
+    }
+    
+    # Industrias consideradas "trending" para el Heat Score
+    TRENDING_INDUSTRIES = ['AI', 'Blockchain', 'FinTech', 'HealthTech', 'EdTech', 'CleanTech']
+    
+    # Campos de los que dependen los scores (si cambian, se invalida la caché)
+    SCORE_FIELDS = [
+        'stage', 'monthly_revenue', 'total_funding_raised', 'employees_count',
+        'description', 'website', 'logo', 'industry_id', 'business_model',
+        'problem_statement', 'solution_description', 'founded_date',
+        'updated_at', 'is_fundraising', 'seeking_amount',
+    ]
+    
     # Relación con fundador
     founder = models.ForeignKey(UserProfile, on_delete=models.CASCADE, limit_choices_to={'user_type': 'founder'})
     
@@ -224,31 +364,62 @@ class Startup(models.Model):
     is_fundraising = models.BooleanField(default=False)
     featured = models.BooleanField(default=False)
     
+    # Búsqueda full-text (tsvector ponderado en PostgreSQL; en SQLite se usa una tabla FTS5)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StartupQuerySet.as_manager()
+    
     def __str__(self):
         return self.company_name
     
+    def save(self, *args, **kwargs):
+        # Los scores memorizados dejan de ser válidos al guardar
+        self.invalidate_score_cache()
+        super().save(*args, **kwargs)
+    
+    # ----- Memoización de scores por instancia -----
+    
+    def _score_state(self):
+        """Valores actuales de los campos de los que dependen los scores"""
+        return tuple(
+            self.logo.name if field == 'logo' else getattr(self, field)
+            for field in self.SCORE_FIELDS
+        )
+    
+    def _memoized_score(self, key, compute):
+        """
+        Calcula cada métrica una sola vez por instancia.
+        La caché se descarta si cambió algún campo de SCORE_FIELDS.
+        """
+        state = self._score_state()
+        cache = self.__dict__.get('_score_cache')
+        if cache is None or cache['state'] != state:
+            cache = {'state': state}
+            self.__dict__['_score_cache'] = cache
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+    
+    def invalidate_score_cache(self):
+        """Descarta los scores memorizados de esta instancia"""
+        self.__dict__.pop('_score_cache', None)
+    
     def calculate_growth_score(self):
         """
         Calcula el Growth Score basado en múltiples factores
         Score: 0-100 donde 100 es el mejor
         """
+        return self._memoized_score('growth_score', self._compute_growth_score)
+    
+    def _compute_growth_score(self):
         score = 0
         
         # Factor 1: Etapa de la empresa (0-25 puntos)
-        stage_scores = {
-            'idea': 5,
-            'prototype': 10,
-            'mvp': 15,
-            'early_traction': 20,
-            'growth': 25,
-            'scale': 22,  # Slightly lower as growth might be slowing
-            'exit': 18    # Company might be winding down
-        }
-        score += stage_scores.get(self.stage, 0)
+        score += self.STAGE_GROWTH_SCORES.get(self.stage, 0)
         
         # Factor 2: Ingresos mensuales (0-25 puntos)
         if self.monthly_revenue:
@@ -311,6 +482,9 @@ class Startup(models.Model):
         Calcula el Heat Score basado en actividad reciente y tendencias
         Score: 0-100 donde 100 es el más "hot"
         """
+        return self._memoized_score('heat_score', self._compute_heat_score)
+    
+    def _compute_heat_score(self):
         from django.utils import timezone
         from datetime import datetime, timedelta
         
@@ -346,8 +520,7 @@ class Startup(models.Model):
                 score += 15
         
         # Factor 4: Industria trending (0-20 puntos)
-        trending_industries = ['AI', 'Blockchain', 'FinTech', 'HealthTech', 'EdTech', 'CleanTech']
-        if self.industry and any(trend in self.industry.name for trend in trending_industries):
+        if self.industry and any(trend in self.industry.name for trend in self.TRENDING_INDUSTRIES):
             score += 20
         elif self.industry:
             score += 10
@@ -356,50 +529,33 @@ class Startup(models.Model):
     
     def calculate_cb_rank(self):
         """
-        Calcula el CB Rank (ranking global)
-        Rank más bajo = mejor posición
+        CB Rank (ranking global): posición por score combinado entre todas
+        las startups, rank más bajo = mejor posición. Se asigna en una sola
+        pasada (ver ranking_service, que documenta el cambio respecto de la
+        fórmula anterior); aquí solo se lee. None si aún no fue rankeada.
         """
-        # Calcular score combinado
-        growth_score = self.calculate_growth_score()
-        heat_score = self.calculate_heat_score()
-        combined_score = (growth_score * 0.6) + (heat_score * 0.4)
-        
-        # Contar startups mejor rankeadas
-        from django.db.models import Q
-        better_startups = Startup.objects.filter(
-            Q(total_funding_raised__gt=self.total_funding_raised) |
-            Q(monthly_revenue__gt=self.monthly_revenue or 0) |
-            Q(employees_count__gt=self.employees_count or 0)
-        ).distinct().count()
-        
-        # Base rank + factor aleatorio para variación
-        base_rank = better_startups + 1
-        
-        # Ajustar según score combinado
-        if combined_score >= 80:
-            rank_adjustment = -500
-        elif combined_score >= 60:
-            rank_adjustment = -200
-        elif combined_score >= 40:
-            rank_adjustment = 0
-        else:
-            rank_adjustment = 500
-        
-        final_rank = max(1, base_rank + rank_adjustment)
-        return final_rank
+        return self._get_rank()[0]
     
     def get_ranking_percentile(self):
         """
         Calcula en qué percentil está esta startup
         """
-        total_startups = Startup.objects.count()
-        rank = self.calculate_cb_rank()
-        
-        if total_startups == 0:
-            return 100
+        return self._get_rank()[1]
+    
+    def _get_rank(self):
+        """(cb_rank, percentil) memorizados: una sola lookup por instancia"""
+        return self._memoized_score('rank', self._lookup_rank)
+    
+    def _lookup_rank(self):
+        """Lookup por id de (cb_rank, percentil), calculando el score si aún no existe"""
+        from .ranking_service import get_rank
+        from .score_service import refresh_startup_score
         
-        percentile = max(1, 100 - ((rank / total_startups) * 100))
-        return round(percentile, 1)
+        rank = get_rank(self.pk)
+        if rank is None:
+            score = refresh_startup_score(self)
+            rank = (score.cb_rank, score.ranking_percentile)
+        return rank
     
     def get_score_summary(self):
         """
@@ -412,11 +568,13 @@ class Startup(models.Model):
             'ranking_percentile': self.get_ranking_percentile()
         }
     
-    def get_performance_grade(self):
+    def get_performance_grade(self, score=None):
         """
         Retorna una calificación basada en el Growth Score
+        (acepta un score ya calculado para no recalcularlo)
         """
-        score = self.calculate_growth_score()
+        if score is None:
+            score = self.calculate_growth_score()
         if score >= 85:
             return {'grade': 'A+', 'color': 'green'}
         elif score >= 75:
@@ -432,11 +590,17 @@ class Startup(models.Model):
         else:
             return {'grade': 'D', 'color': 'red'}
     
-    def get_market_position(self):
+    def get_market_position(self, percentile=None, cb_rank=None):
         """
         Retorna la posición en el mercado basada en el percentil
+        (acepta rank y percentil ya leídos para no volver a buscarlos).
+        Sin rank asignado todavía (startup nueva hasta la próxima pasada de
+        recompute_scores) retorna 'Unranked' en lugar de un percentil 0.
         """
-        percentile = self.get_ranking_percentile()
+        if percentile is None:
+            cb_rank, percentile = self._get_rank()
+        if cb_rank is None:
+            return 'Unranked'
         if percentile >= 90:
             return 'Top 10%'
         elif percentile >= 75:
@@ -503,10 +667,44 @@ class Startup(models.Model):
                 return False
         
         return False
-    
+
     class Meta:
         ordering = ['-created_at']
 
+
+class StartupScore(models.Model):
+    """
+    Scores precalculados de cada startup (materializados).
+    Se actualizan al guardar la startup para que el directorio y el perfil
+    lean valores ya calculados en lugar de ejecutar el scoring por request.
+    """
+    startup = models.OneToOneField(Startup, on_delete=models.CASCADE, primary_key=True, related_name='score')
+
+    # Scores
+    growth_score = models.PositiveSmallIntegerField(default=0)
+    heat_score = models.PositiveSmallIntegerField(default=0)
+    combined_score = models.FloatField(default=0)
+
+    # Ranking
+    cb_rank = models.PositiveIntegerField(null=True, blank=True)
+    ranking_percentile = models.FloatField(default=0)
+
+    # Timestamps
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Startup Score'
+        # (columna, startup_id): orden y cursor del directorio (paginación keyset)
+        indexes = [
+            models.Index(fields=['growth_score', 'startup']),
+            models.Index(fields=['heat_score', 'startup']),
+            models.Index(fields=['cb_rank', 'startup']),
+            models.Index(fields=['-combined_score']),
+        ]
+
+    def __str__(self):
+        return f"Score - {self.startup_id} (growth {self.growth_score}, heat {self.heat_score})"
+
 # Modelos nuevos - comentados temporalmente para migraciones
 """
 class UserProfile(models.Model):
@@ -683,6 +881,9 @@ class InvestorProfile(models.Model):
     is_accepting_pitches = models.BooleanField(default=True)
     featured = models.BooleanField(default=False)
     
+    # Búsqueda full-text (ver search_service)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -692,6 +893,39 @@ class InvestorProfile(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', '-created_at']),
+            models.Index(fields=['investor_type', 'is_active']),
+            models.Index(fields=['geographic_focus', 'is_active']),
+        ]
+
+# ÍNDICE DE MATCHES INVERSOR-STARTUP
+class InvestorStartupMatch(models.Model):
+    """
+    Afinidad precalculada entre un inversor activo y una startup que está
+    levantando capital (ver match_service). Solo se guardan los pares por
+    encima del score mínimo; los dashboards leen el top-N por índice.
+    """
+    investor = models.ForeignKey(InvestorProfile, on_delete=models.CASCADE, related_name='startup_matches')
+    startup = models.ForeignKey(Startup, on_delete=models.CASCADE, related_name='investor_matches')
+
+    score = models.PositiveSmallIntegerField(default=0)
+    stage_match = models.BooleanField(default=False)
+    ticket_match = models.BooleanField(default=False)
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Investor-Startup Match'
+        verbose_name_plural = 'Investor-Startup Matches'
+        unique_together = ['investor', 'startup']
+        indexes = [
+            models.Index(fields=['investor', '-score']),
+            models.Index(fields=['startup', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.investor_id} <-> {self.startup_id} ({self.score})"
 
 # MODELO DE CONTACTO (mantener para formularios)
 class Contact(models.Model):
@@ -1161,6 +1395,16 @@ class ConnectionRequest(models.Model):
         self.save()
 
 
+MESSAGE_PREVIEW_LENGTH = 100
+
+
+def message_preview(content):
+    """Preview corto de un mensaje para la bandeja y las notificaciones"""
+    if len(content) <= MESSAGE_PREVIEW_LENGTH:
+        return content
+    return content[:MESSAGE_PREVIEW_LENGTH - 3] + '...'
+
+
 class Conversation(models.Model):
     """Conversaciones 1-a-1 entre usuarios conectados"""
     participant1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_p1')
@@ -1174,6 +1418,18 @@ class Conversation(models.Model):
     p1_last_read = models.DateTimeField(null=True, blank=True)
     p2_last_read = models.DateTimeField(null=True, blank=True)
     
+    # Denormalizado: último mensaje y no leídos por participante (se actualizan
+    # en Message.save y mark_as_read; la bandeja se arma sin tocar Message)
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_preview = models.CharField(max_length=255, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    p1_unread_count = models.PositiveIntegerField(default=0)
+    p2_unread_count = models.PositiveIntegerField(default=0)
+    
+    # Último número de secuencia asignado a un mensaje (ver Message.seq)
+    last_seq = models.PositiveBigIntegerField(default=0)
+    
     # Google Meet Integration
     meet_enabled = models.BooleanField(default=False, verbose_name="Videollamadas habilitadas")
     meet_link = models.URLField(blank=True, null=True, verbose_name="Enlace de Google Meet")
@@ -1194,27 +1450,96 @@ class Conversation(models.Model):
         """Obtiene el otro participante de la conversación"""
         return self.participant2 if self.participant1 == user else self.participant1
     
+    def _participant_prefix(self, user):
+        """'p1' o 'p2' según el participante (por id, sin cargar el usuario)"""
+        user_id = getattr(user, 'pk', user)
+        return 'p1' if self.participant1_id == user_id else 'p2'
+    
     def get_unread_count(self, user):
-        """Cuenta mensajes no leídos para un usuario específico"""
-        last_read = self.p1_last_read if self.participant1 == user else self.p2_last_read
-        
-        if last_read:
-            return self.messages.filter(
-                created_at__gt=last_read
-            ).exclude(sender=user).count()
-        else:
-            return self.messages.exclude(sender=user).count()
+        """Mensajes no leídos para un usuario específico (contador denormalizado)"""
+        return getattr(self, f'{self._participant_prefix(user)}_unread_count')
     
     def mark_as_read(self, user):
         """Marca la conversación como leída para un usuario"""
         from django.utils import timezone
         now = timezone.now()
         
-        if self.participant1 == user:
-            self.p1_last_read = now
-        else:
-            self.p2_last_read = now
-        self.save(update_fields=['p1_last_read' if self.participant1 == user else 'p2_last_read'])
+        prefix = self._participant_prefix(user)
+        setattr(self, f'{prefix}_last_read', now)
+        setattr(self, f'{prefix}_unread_count', 0)
+        Conversation.objects.filter(pk=self.pk).update(**{
+            f'{prefix}_last_read': now,
+            f'{prefix}_unread_count': 0,
+        })
+    
+    @classmethod
+    def lock_for_messages(cls, conversation_ids):
+        """
+        Lee con el lock de la fila (SELECT ... FOR UPDATE, en orden de id) las
+        conversaciones que van a recibir mensajes. Los seq se numeran desde su
+        last_seq y record_messages escribe el nuevo last_seq en su mismo
+        UPDATE: una lectura y una escritura por conversación. Debe llamarse
+        dentro de la transacción del INSERT.
+        """
+        return cls.objects.select_for_update().order_by('pk').in_bulk(list(conversation_ids))
+    
+    def record_message(self, message):
+        """Registra un mensaje nuevo (ver record_messages)"""
+        self.record_messages([message])
+    
+    def record_messages(self, messages):
+        """
+        Actualiza en un solo UPDATE angosto el último mensaje, updated_at y
+        los contadores de no leídos, sin reescribir el resto de la fila. Un
+        lote de mensajes de la misma conversación cuesta un único UPDATE. El
+        último mensaje solo se reemplaza si es más nuevo, así dos envíos
+        concurrentes no lo retroceden.
+        """
+        latest = max(messages, key=lambda message: (message.created_at, message.pk or 0))
+        unread = {'p1_unread_count': 0, 'p2_unread_count': 0}
+        for message in messages:
+            recipient_prefix = 'p2' if message.sender_id == self.participant1_id else 'p1'
+            unread[f'{recipient_prefix}_unread_count'] += 1
+        
+        is_newer = models.Q(last_message_at__isnull=True) | models.Q(last_message_at__lte=latest.created_at)
+        preview = message_preview(latest.content)
+        
+        def if_newer(value, field, output_field):
+            return models.Case(
+                models.When(is_newer, then=models.Value(value)),
+                default=models.F(field),
+                output_field=output_field,
+            )
+        
+        last_seq = max((message.seq for message in messages if message.seq is not None), default=None)
+        
+        updates = {
+            'last_message_sender_id': if_newer(latest.sender_id, 'last_message_sender_id', models.BigIntegerField()),
+            'last_message_preview': if_newer(preview, 'last_message_preview', models.CharField()),
+            'last_message_at': if_newer(latest.created_at, 'last_message_at', models.DateTimeField()),
+            'updated_at': Greatest('updated_at', models.Value(latest.created_at)),
+        }
+        if latest.pk is not None:
+            updates['last_message_id'] = if_newer(latest.pk, 'last_message_id', models.BigIntegerField())
+        if last_seq is not None:
+            updates['last_seq'] = Greatest('last_seq', models.Value(last_seq))
+        for field, count in unread.items():
+            if count:
+                updates[field] = models.F(field) + count
+        Conversation.objects.filter(pk=self.pk).update(**updates)
+        
+        if self.last_message_at is None or self.last_message_at <= latest.created_at:
+            if latest.pk is not None:
+                self.last_message_id = latest.pk
+            self.last_message_sender_id = latest.sender_id
+            self.last_message_preview = preview
+            self.last_message_at = latest.created_at
+        if self.updated_at is None or self.updated_at < latest.created_at:
+            self.updated_at = latest.created_at
+        if last_seq is not None and last_seq > self.last_seq:
+            self.last_seq = last_seq
+        for field, count in unread.items():
+            setattr(self, field, getattr(self, field) + count)
 
 
 class MeetRequest(models.Model):
@@ -1263,6 +1588,45 @@ class MeetRequest(models.Model):
         self.save()
 
 
+class MessageQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Inserta los mensajes (numerados desde el last_seq de su conversación,
+        leído con lock) y actualiza cada conversación afectada una sola vez
+        (un UPDATE por conversación, no por mensaje, que también avanza last_seq)
+        """
+        objs = list(objs)
+        new_objs = [message for message in objs if message.pk is None]
+        pending_seq = {}
+        for message in objs:
+            if message.seq is None:
+                pending_seq.setdefault(message.conversation_id, []).append(message)
+        try:
+            with transaction.atomic(using=self.db):
+                conversations = Conversation.lock_for_messages({message.conversation_id for message in objs})
+                for conversation_id, messages in pending_seq.items():
+                    first_seq = conversations[conversation_id].last_seq + 1
+                    for offset, message in enumerate(messages):
+                        message.seq = first_seq + offset
+                
+                created = super().bulk_create(objs, *args, **kwargs)
+                by_conversation = {}
+                for message in created:
+                    by_conversation.setdefault(message.conversation_id, []).append(message)
+                for conversation_id, messages in by_conversation.items():
+                    conversations[conversation_id].record_messages(messages)
+        except Exception:
+            # Rollback: el seq y el id asignados ya no existen; un reintento debe pedir otros
+            for messages in pending_seq.values():
+                for message in messages:
+                    message.seq = None
+            for message in new_objs:
+                message.pk = None
+                message._state.adding = True
+            raise
+        return created
+
+
 class Message(models.Model):
     """Mensajes dentro de una conversación"""
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
@@ -1274,31 +1638,67 @@ class Message(models.Model):
     # Archivos adjuntos (opcional)
     attachment = models.FileField(upload_to='message_attachments/', blank=True, null=True)
     
-    # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Metadata (el timestamp puede asignarse antes del INSERT en la escritura diferida del chat)
+    created_at = models.DateTimeField(default=timezone.now)
     is_read = models.BooleanField(default=False)
     
+    # Clave de idempotencia generada al recibir el mensaje (reintentos del cliente o del flush)
+    client_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    
+    # Secuencia creciente dentro de la conversación (reanudar el chat tras reconectar)
+    seq = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    
+    objects = MessageQuerySet.as_manager()
+    
     class Meta:
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['conversation', 'created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'seq'], name='unique_message_seq'),
+        ]
     
     def __str__(self):
         return f"{self.sender.get_full_name()}: {self.content[:50]}"
     
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Actualizar timestamp de la conversación
-        self.conversation.save()
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            conversation = Conversation.lock_for_messages([self.conversation_id])[self.conversation_id]
+            if self.seq is None:
+                self.seq = conversation.last_seq + 1
+            if not Message.conversation.is_cached(self):
+                self.conversation = conversation
+            super().save(*args, **kwargs)
+            # Último mensaje, no leídos, seq y timestamp de la conversación (un UPDATE)
+            self.conversation.record_message(self)
 
 
 class Notification(models.Model):
-    """Notificación interna del sistema (no push)"""
+    """
+    Notificación interna del sistema (no push)
+    Las no leídas de una misma conversación y tipo se agrupan en una sola fila
+    (ver notification_service.save_notifications): count acumula los eventos,
+    content/message guardan el último y created_at su fecha. Las de tipo
+    'general' no se agrupan: su contenido no es intercambiable.
+    """
+    KIND_CHOICES = [
+        ('message', 'Mensaje'),
+        ('meet_request', 'Solicitud de videollamada'),
+        ('meet_started', 'Videollamada iniciada'),
+        ('meet_accepted', 'Videollamada aceptada'),
+        ('meet_rejected', 'Videollamada rechazada'),
+        ('general', 'General'),
+    ]
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     message = models.ForeignKey(Message, on_delete=models.CASCADE, null=True, blank=True)
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='general')
     content = models.CharField(max_length=255)  # Preview del mensaje
+    count = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -1306,14 +1706,28 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
+        constraints = [
+            # Una sola fila no leída por usuario, conversación y tipo agrupable
+            models.UniqueConstraint(
+                fields=['user', 'conversation', 'kind'],
+                condition=models.Q(is_read=False) & ~models.Q(kind='general'),
+                name='unique_unread_notification',
+            ),
+        ]
     
     def __str__(self):
         return f"Notificación para {self.user.username}: {self.content[:50]}"
     
     def mark_as_read(self):
-        """Marca la notificación como leída"""
+        """Marca la notificación como leída (y avisa al socket de notificaciones si cambió)"""
+        from .notification_service import record_read
+        
+        if self.is_read:
+            return
+        updated = Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True)
         self.is_read = True
-        self.save()
+        if updated:
+            record_read(self.user_id, [self.pk], -updated)
 
 
 class GoogleOAuthCredential(models.Model):
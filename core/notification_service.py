@@ -0,0 +1,247 @@
+"""
+Entrega en tiempo real de notificaciones (ws/notifications/) y contador de no leídas
+Cada usuario tiene un grupo del channel layer al que se une su
+NotificationConsumer. La creación de notificaciones y los cambios de estado
+de lectura publican deltas: el payload de lo nuevo y cuánto cambia el
+contador de no leídas, así el cliente actualiza el badge sin recargar.
+
+Las notificaciones se guardan con save_notifications / bulk_notify: las no
+leídas de una misma conversación y tipo (salvo 'general') se agrupan en una
+fila con contador y el último preview, así una ráfaga de mensajes es una fila
+y un solo +1.
+
+El contador vive en el cache (un entero por usuario) y se ajusta con esos
+mismos deltas al confirmar la transacción. Expira cada
+NOTIFICATION_UNREAD_TTL segundos y se vuelve a contar en la base, lo que
+corrige cualquier deriva; reconcile_unread_counts hace lo mismo para todos.
+Los deltas solo son coherentes con un cache compartido por todos los
+workers (settings.CACHES con Redis cuando hay REDIS_URL): con un cache por
+proceso, los demás workers mostrarían un contador viejo hasta que expire.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Notification
+
+
+NOTIFICATION_UNREAD_TTL = getattr(settings, 'NOTIFICATION_UNREAD_TTL', 60 * 15)
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _count_unread(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user_id):
+    """Contador de no leídas: un cache get (un COUNT solo si no está en cache)"""
+    count = cache.get(unread_count_key(user_id))
+    if count is None:
+        count = _count_unread(user_id)
+        cache.add(unread_count_key(user_id), count, NOTIFICATION_UNREAD_TTL)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Aplica un delta al contador cacheado y retorna el valor nuevo. Si la clave
+    no está, o el valor queda negativo (deriva), se descarta y la próxima
+    lectura reconcilia contra la base; en ese caso retorna None.
+    """
+    key = unread_count_key(user_id)
+    try:
+        count = cache.incr(key, delta) if delta else cache.get(key)
+    except ValueError:
+        return None
+    if count is not None and count < 0:
+        cache.delete(key)
+        return None
+    return count
+
+
+def reconcile_unread_counts(user_ids=None):
+    """Recalcula en la base y guarda el contador de los usuarios indicados (todos si None)"""
+    unread = Notification.objects.filter(is_read=False)
+    if user_ids is None:
+        user_ids = User.objects.values_list('id', flat=True)
+    else:
+        unread = unread.filter(user_id__in=user_ids)
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(unread.values('user_id').annotate(total=Count('id')).values_list('user_id', 'total'))
+    cache.set_many({unread_count_key(user_id): count for user_id, count in counts.items()}, NOTIFICATION_UNREAD_TTL)
+    return len(counts)
+
+
+def notification_group_name(user_id):
+    return f'notifications_{user_id}'
+
+
+def serialize_notification(notification):
+    return {
+        'id': notification.id,
+        'kind': notification.kind,
+        'content': notification.content,
+        'count': notification.count,
+        'conversation_id': notification.conversation_id,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def _send(user_id, event):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(notification_group_name(user_id), event)
+
+
+def _record_on_commit(user_id, unread_delta, event):
+    """
+    Al confirmar la transacción (de inmediato si no hay una abierta) ajusta el
+    contador y publica el evento con el delta y el contador resultante (None
+    si no estaba en cache: no se cuenta aquí para no hacer un COUNT por
+    destinatario en los envíos masivos)
+    """
+    def record():
+        unread_count = adjust_unread_count(user_id, unread_delta)
+        _send(user_id, dict(event, unread_delta=unread_delta, unread_count=unread_count))
+
+    transaction.on_commit(record)
+
+
+def record_created(notifications):
+    """Un evento por usuario con las notificaciones nuevas"""
+    by_user = {}
+    for notification in notifications:
+        by_user.setdefault(notification.user_id, []).append(notification)
+    for user_id, items in by_user.items():
+        _record_on_commit(user_id, sum(1 for n in items if not n.is_read), {
+            'type': 'notifications_created',
+            'notifications': [serialize_notification(n) for n in items],
+        })
+
+
+def record_updated(notifications):
+    """Filas agrupadas que recibieron eventos nuevos (el contador de no leídas no cambia)"""
+    by_user = {}
+    for notification in notifications:
+        by_user.setdefault(notification.user_id, []).append(notification)
+    for user_id, items in by_user.items():
+        _record_on_commit(user_id, 0, {
+            'type': 'notifications_updated',
+            'notifications': [serialize_notification(n) for n in items],
+        })
+
+
+def record_read(user_id, notification_ids, unread_delta):
+    """Notificaciones marcadas como leídas (notification_ids=None: todas)"""
+    if not unread_delta:
+        return
+    _record_on_commit(user_id, unread_delta, {
+        'type': 'notifications_read',
+        'notification_ids': notification_ids,
+    })
+
+
+def record_deleted(user_id, notification_ids, unread_delta):
+    _record_on_commit(user_id, unread_delta, {
+        'type': 'notifications_deleted',
+        'notification_ids': notification_ids,
+    })
+
+
+def _coalesce_key(notification):
+    """Clave de agrupación; None si la notificación no se agrupa"""
+    if notification.conversation_id is None or notification.is_read or notification.kind == 'general':
+        return None
+    return (notification.user_id, notification.conversation_id, notification.kind)
+
+
+def save_notifications(notifications):
+    """
+    Guarda notificaciones sin guardar (en orden cronológico) agrupando las no
+    leídas por usuario, conversación y tipo: dentro del lote y contra la fila
+    no leída existente (índice único parcial). Un bulk_create para las filas
+    nuevas y un bulk_update para las agrupadas. Retorna las filas afectadas.
+    """
+    standalone = []
+    merged = {}
+    for notification in notifications:
+        key = _coalesce_key(notification)
+        if key is None:
+            standalone.append(notification)
+            continue
+        previous = merged.get(key)
+        if previous is not None:
+            notification.count += previous.count
+        merged[key] = notification
+
+    # Dos escrituras concurrentes pueden crear la misma fila: el índice único
+    # rechaza una y el reintento la encuentra y la agrupa
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                return _save_coalesced(standalone, merged)
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def _save_coalesced(standalone, merged):
+    existing = {}
+    if merged:
+        user_ids, conversation_ids, kinds = (set(values) for values in zip(*merged))
+        rows = Notification.objects.select_for_update().filter(
+            is_read=False,
+            user_id__in=user_ids,
+            conversation_id__in=conversation_ids,
+            kind__in=kinds,
+        )
+        existing = {_coalesce_key(row): row for row in rows}
+
+    now = timezone.now()
+    created = list(standalone)
+    updated = []
+    for key, notification in merged.items():
+        row = existing.get(key)
+        if row is None:
+            created.append(notification)
+            continue
+        row.count += notification.count
+        row.content = notification.content
+        row.message_id = notification.message_id
+        row.created_at = now
+        updated.append(row)
+
+    Notification.objects.bulk_create(created)
+    Notification.objects.bulk_update(updated, ['count', 'content', 'message', 'created_at'])
+    record_created(created)
+    record_updated(updated)
+    return created + updated
+
+
+def bulk_notify(users, content, conversation=None, kind='general', message=None):
+    """Misma notificación para varios usuarios (instancias o ids), en un solo lote"""
+    return save_notifications([
+        Notification(
+            user_id=getattr(user, 'pk', user),
+            conversation=conversation,
+            message=message,
+            kind=kind,
+            content=content,
+        )
+        for user in users
+    ])
+
+
+def notify(user, content, conversation=None, kind='general', message=None):
+    """Una notificación (agrupada con la no leída equivalente si existe)"""
+    return bulk_notify([user], content, conversation=conversation, kind=kind, message=message)[0]
@@ -0,0 +1,116 @@
+"""
+Paginación por cursor (keyset) para listados grandes
+Cada página filtra por la clave de orden del último elemento visto en lugar
+de usar OFFSET, así el costo por página es constante sin importar cuántas
+filas haya antes. Los cursores son tokens firmados y opacos.
+"""
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+import datetime
+import json
+
+
+CURSOR_SALT = 'core.pagination.cursor'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Como DjangoJSONEncoder pero conservando microsegundos (necesarios para el keyset)"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class InvalidCursor(Exception):
+    """El cursor recibido no es válido (manipulado o de otro listado)"""
+
+
+class KeysetPage:
+    """Una página de resultados con cursores para avanzar/retroceder"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(key, value, pk, direction):
+    """Genera un token opaco a partir de la clave de orden y el id"""
+    payload = json.dumps({'k': key, 'v': value, 'id': pk, 'd': direction}, cls=CursorEncoder)
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, key):
+    """Decodifica un token; `key` debe coincidir con el orden del listado"""
+    try:
+        payload = json.loads(signing.loads(token, salt=CURSOR_SALT))
+    except (signing.BadSignature, ValueError, TypeError) as exc:
+        raise InvalidCursor(str(exc))
+    if payload.get('k') != key or payload.get('d') not in ('next', 'prev'):
+        raise InvalidCursor('Cursor de otro listado')
+    return payload['v'], payload['id'], payload['d']
+
+
+def paginate_keyset(queryset, sort_field, descending=True, cursor=None, page_size=20, key=None, pk_field='pk'):
+    """
+    Pagina `queryset` ordenado por (sort_field, id).
+    `sort_field` debe ser un campo o anotación no nula del modelo (no un
+    lookup con __); el id desempata.
+    `pk_field` es la columna de desempate (mismo valor que el id): cuando el
+    orden es una columna de una tabla unida uno a uno, usar su FK (p. ej.
+    'score__startup_id') permite resolver orden y filtro con un índice
+    compuesto (columna, fk) de esa tabla.
+    `key` identifica el orden dentro del cursor (por defecto sort_field + dirección).
+    """
+    key = key or f"{sort_field}:{'desc' if descending else 'asc'}"
+    value, pk, direction = (None, None, 'next')
+    if cursor:
+        value, pk, direction = decode_cursor(cursor, key)
+
+    # Al retroceder se recorre el orden inverso y luego se invierte la página
+    forward = direction == 'next'
+    scan_descending = descending if forward else not descending
+    if scan_descending:
+        ordering = (f'-{sort_field}', f'-{pk_field}')
+        after = Q(**{f'{sort_field}__lt': value}) | Q(**{sort_field: value, f'{pk_field}__lt': pk})
+    else:
+        ordering = (sort_field, pk_field)
+        after = Q(**{f'{sort_field}__gt': value}) | Q(**{sort_field: value, f'{pk_field}__gt': pk})
+
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(after)
+
+    # Se pide un elemento extra para saber si hay más páginas
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    def cursor_for(item, new_direction):
+        return encode_cursor(key, getattr(item, sort_field), item.pk, new_direction)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or not forward:
+            next_cursor = cursor_for(rows[-1], 'next')
+        if cursor and (forward or has_more):
+            prev_cursor = cursor_for(rows[0], 'prev')
+    return KeysetPage(rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
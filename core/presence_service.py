@@ -0,0 +1,147 @@
+"""
+Registro de presencia (quién está online) con TTL por heartbeat
+Cada socket abierto es una conexión del usuario; el usuario está online
+mientras alguna de sus conexiones haya enviado un heartbeat dentro de
+PRESENCE_TTL segundos. connect/disconnect informan solo las transiciones
+(primera conexión, última desconexión), así varias pestañas no generan
+broadcasts repetidos, y una pestaña que muere sin desconectar expira sola.
+
+Backends:
+- Redis (REDIS_URL, el mismo del channel layer): un ZSET por usuario con
+  sus conexiones y un ZSET global usuario -> vencimiento para las consultas
+  por lote (ZMSCORE, un round trip)
+- Memoria: sustituto por proceso para desarrollo (InMemoryChannelLayer)
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+PRESENCE_TTL = getattr(settings, 'PRESENCE_TTL', 60)
+PRESENCE_USERS_KEY = 'presence:users'
+
+# Quita la conexión y, si era la última viva, al usuario del ZSET global,
+# todo en un paso atómico: un connect concurrente en otro worker no puede
+# quedar entre el ZCARD y el ZREM (el usuario quedaría offline estando conectado)
+# KEYS: conexiones del usuario, PRESENCE_USERS_KEY
+# ARGV: connection_id, now, user_id
+DISCONNECT_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+if redis.call('ZCARD', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class InMemoryPresence:
+    """Presencia en memoria del proceso (desarrollo o un único worker)"""
+
+    def __init__(self, ttl=PRESENCE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def _live(self, user_id, now):
+        connections = self._connections.get(user_id, {})
+        for connection_id, expires_at in list(connections.items()):
+            if expires_at <= now:
+                del connections[connection_id]
+        if not connections:
+            self._connections.pop(user_id, None)
+        return connections
+
+    def connect(self, user_id, connection_id):
+        """Registra una conexión. True si el usuario pasó a estar online."""
+        now = time.time()
+        with self._lock:
+            was_online = bool(self._live(user_id, now))
+            self._connections.setdefault(user_id, {})[connection_id] = now + self.ttl
+        return not was_online
+
+    def heartbeat(self, user_id, connection_id):
+        with self._lock:
+            self._connections.setdefault(user_id, {})[connection_id] = time.time() + self.ttl
+
+    def disconnect(self, user_id, connection_id):
+        """Quita una conexión. True si era la última (el usuario quedó offline)."""
+        now = time.time()
+        with self._lock:
+            self._connections.get(user_id, {}).pop(connection_id, None)
+            return not self._live(user_id, now)
+
+    def online_user_ids(self, user_ids):
+        """Subconjunto de user_ids que están online"""
+        now = time.time()
+        with self._lock:
+            return {user_id for user_id in set(user_ids) if self._live(user_id, now)}
+
+
+class RedisPresence:
+    """Presencia compartida entre procesos en Redis"""
+
+    def __init__(self, url, ttl=PRESENCE_TTL):
+        import redis
+
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url)
+        self._disconnect = self.client.register_script(DISCONNECT_SCRIPT)
+
+    def _user_key(self, user_id):
+        return f'presence:user:{user_id}'
+
+    def _touch(self, pipe, user_id, connection_id, now):
+        expires_at = now + self.ttl
+        key = self._user_key(user_id)
+        pipe.zadd(key, {connection_id: expires_at})
+        pipe.expire(key, self.ttl)
+        pipe.zadd(PRESENCE_USERS_KEY, {user_id: expires_at}, gt=True)
+
+    def connect(self, user_id, connection_id):
+        now = time.time()
+        key = self._user_key(user_id)
+        # Pipeline transaccional (MULTI/EXEC): atómico frente a disconnect
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zcard(key)
+        self._touch(pipe, user_id, connection_id, now)
+        live_before = pipe.execute()[1]
+        return live_before == 0
+
+    def heartbeat(self, user_id, connection_id):
+        pipe = self.client.pipeline()
+        self._touch(pipe, user_id, connection_id, time.time())
+        pipe.execute()
+
+    def disconnect(self, user_id, connection_id):
+        removed = self._disconnect(
+            keys=[self._user_key(user_id), PRESENCE_USERS_KEY],
+            args=[connection_id, time.time(), user_id],
+        )
+        return bool(removed)
+
+    def online_user_ids(self, user_ids):
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return set()
+        now = time.time()
+        scores = self.client.zmscore(PRESENCE_USERS_KEY, user_ids)
+        return {user_id for user_id, score in zip(user_ids, scores) if score is not None and score > now}
+
+
+def _build_presence():
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    if redis_url:
+        return RedisPresence(redis_url)
+    return InMemoryPresence()
+
+
+presence = _build_presence()
+
+
+def online_user_ids(user_ids):
+    """Consulta por lote para listados (bandeja, conexiones)"""
+    return presence.online_user_ids(user_ids)
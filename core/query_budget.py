@@ -0,0 +1,213 @@
+"""
+Instrumentación de SQL por request
+QueryBudgetMiddleware cuenta las queries, el tiempo SQL y las queries
+repetidas (misma forma, distintos parámetros: la huella típica de un N+1)
+de cada request. Los resultados se agrupan por nombre de URL resuelto en una
+ventana móvil en memoria del proceso, y las vistas que superan su presupuesto
+se registran en el log 'core'.
+
+Configuración (settings):
+- QUERY_BUDGET_ENABLED: activa el middleware (por defecto True)
+- QUERY_BUDGET_DEFAULT: máximo de queries para vistas sin presupuesto propio
+- QUERY_BUDGETS: {'core:messages_inbox': 10, ...} presupuestos por vista
+- QUERY_BUDGET_SQL_MS: tiempo SQL máximo por request (ms)
+- QUERY_STATS_WINDOW: requests recordados por vista
+
+assert_max_queries / assert_view_within_budget sirven para fijar los
+presupuestos en CI.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+
+logger = logging.getLogger('core')
+
+DEFAULT_QUERY_BUDGET = 50
+DEFAULT_SQL_MS_BUDGET = 500
+DEFAULT_STATS_WINDOW = 200
+DUPLICATE_THRESHOLD = 3
+TOP_DUPLICATES = 5
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def query_shape(sql):
+    """Normaliza una query a su forma (sin literales ni listas IN variables)"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def get_budget(view_name):
+    """(max_queries, max_sql_ms) configurados para una vista"""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    max_queries = budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', DEFAULT_QUERY_BUDGET))
+    return max_queries, getattr(settings, 'QUERY_BUDGET_SQL_MS', DEFAULT_SQL_MS_BUDGET)
+
+
+class QueryRecorder:
+    """execute_wrapper que acumula conteo, tiempo y formas de las queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.sql_ms = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_ms += (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def duplicates(self, threshold=DUPLICATE_THRESHOLD):
+        """Formas ejecutadas al menos `threshold` veces, de más a menos repetidas"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class QueryStats:
+    """Ventana móvil de métricas por vista (memoria del proceso)"""
+
+    def __init__(self, window=DEFAULT_STATS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._duplicates = {}
+
+    def add(self, view_name, recorder):
+        with self._lock:
+            samples = self._samples.setdefault(view_name, deque(maxlen=self.window))
+            samples.append((recorder.count, recorder.sql_ms))
+            duplicates = self._duplicates.setdefault(view_name, Counter())
+            for shape, n in recorder.duplicates():
+                duplicates[shape] = max(duplicates[shape], n)
+
+    def snapshot(self):
+        """Resumen por vista, ordenado por promedio de queries"""
+        with self._lock:
+            items = [(name, list(samples), self._duplicates.get(name, Counter()))
+                     for name, samples in self._samples.items()]
+
+        summary = []
+        for name, samples, duplicates in items:
+            counts = sorted(count for count, _ in samples)
+            times = [ms for _, ms in samples]
+            max_queries, max_sql_ms = get_budget(name)
+            summary.append({
+                'view': name,
+                'requests': len(samples),
+                'avg_queries': round(sum(counts) / len(counts), 1),
+                'p95_queries': counts[min(len(counts) - 1, int(len(counts) * 0.95))],
+                'max_queries': counts[-1],
+                'avg_sql_ms': round(sum(times) / len(times), 2),
+                'max_sql_ms': round(max(times), 2),
+                'budget': max_queries,
+                'sql_ms_budget': max_sql_ms,
+                'over_budget': sum(1 for count, ms in samples if count > max_queries or ms > max_sql_ms),
+                'duplicates': [
+                    {'shape': shape, 'max_repeats': n} for shape, n in duplicates.most_common(TOP_DUPLICATES)
+                ],
+            })
+        summary.sort(key=lambda row: row['avg_queries'], reverse=True)
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._duplicates.clear()
+
+
+query_stats = QueryStats(getattr(settings, 'QUERY_STATS_WINDOW', DEFAULT_STATS_WINDOW))
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return match.view_name
+
+
+class QueryBudgetMiddleware:
+    """Registra queries/tiempo SQL por vista y avisa cuando se excede el presupuesto"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_BUDGET_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+
+        view_name = _view_name(request)
+        if view_name is None:
+            return response
+
+        query_stats.add(view_name, recorder)
+        max_queries, max_sql_ms = get_budget(view_name)
+        if recorder.count > max_queries or recorder.sql_ms > max_sql_ms:
+            duplicates = '; '.join(f'{n}x {shape[:120]}' for shape, n in recorder.duplicates()[:3])
+            logger.warning(
+                f"Query budget exceeded in {view_name} ({request.method} {request.path}): "
+                f"{recorder.count} queries (budget {max_queries}), {recorder.sql_ms:.1f} ms SQL "
+                f"(budget {max_sql_ms}). Repeated: {duplicates or 'none'}"
+            )
+        return response
+
+
+def _describe(recorder):
+    lines = [f'{n}x {shape}' for shape, n in recorder.duplicates(threshold=2)]
+    return '\n'.join(lines) or 'sin queries repetidas'
+
+
+@contextmanager
+def assert_max_queries(max_queries, label='bloque'):
+    """
+    Falla (AssertionError) si el bloque ejecuta más de `max_queries` queries.
+    El mensaje incluye las formas repetidas para localizar el N+1.
+    """
+    recorder = QueryRecorder()
+    with recorder.record():
+        yield recorder
+    if recorder.count > max_queries:
+        raise AssertionError(
+            f'{label} ejecutó {recorder.count} queries (presupuesto {max_queries}):\n{_describe(recorder)}'
+        )
+
+
+def assert_view_within_budget(client, path, method='get', max_queries=None, **kwargs):
+    """
+    Hace el request con el test client y verifica el presupuesto de la vista
+    (QUERY_BUDGETS o max_queries explícito). Retorna la respuesta.
+    """
+    if max_queries is None:
+        try:
+            view_name = resolve(path.split('?', 1)[0]).view_name
+        except Resolver404:
+            raise AssertionError(f'{path} no resuelve a ninguna vista')
+        max_queries, _ = get_budget(view_name)
+    with assert_max_queries(max_queries, label=f'{method.upper()} {path}'):
+        response = getattr(client, method)(path, **kwargs)
+    return response
@@ -0,0 +1,87 @@
+"""
+Servicio de ranking global de startups
+Asigna el CB Rank de todas las startups en una sola pasada basada en
+conjuntos (window function RANK() en PostgreSQL, ordenamiento equivalente
+en SQLite) y expone lookups de rank/percentil por id de startup.
+
+Definición: el CB Rank es la posición de la startup ordenando por score
+combinado (growth 60% + heat 40%), con empates en la misma posición. Antes
+era una estimación por startup (cuántas superaban en funding, ingresos o
+empleados, con ajustes de ±500/200 según el score combinado), que no era
+un orden total y costaba un COUNT sobre toda la tabla por startup.
+"""
+from django.db import connection, transaction
+
+from .models import StartupScore
+
+
+def percentile_for_rank(rank, total):
+    """Percentil de un rank dentro de un total de startups"""
+    if not total:
+        return 100
+    return round(max(1, 100 - ((rank / total) * 100)), 1)
+
+
+def _assign_ranks_postgres(total):
+    """RANK() OVER (ORDER BY combined_score DESC) en un único UPDATE"""
+    table = connection.ops.quote_name(StartupScore._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} AS s
+            SET cb_rank = r.position,
+                ranking_percentile = ROUND(GREATEST(1, 100 - (r.position::numeric / %s) * 100), 1)
+            FROM (
+                SELECT startup_id, RANK() OVER (ORDER BY combined_score DESC) AS position
+                FROM {table}
+            ) AS r
+            WHERE s.startup_id = r.startup_id
+            """,
+            [total],
+        )
+
+
+def _assign_ranks_sorted(total, batch_size):
+    """Equivalente a RANK(): se ordena por score y los empates comparten posición"""
+    scores = StartupScore.objects.order_by('-combined_score').values_list('startup_id', 'combined_score')
+
+    updates = []
+    previous_score = None
+    rank = 0
+    for position, (startup_id, combined_score) in enumerate(scores.iterator(chunk_size=batch_size), start=1):
+        if combined_score != previous_score:
+            rank = position
+            previous_score = combined_score
+        updates.append(StartupScore(
+            startup_id=startup_id,
+            cb_rank=rank,
+            ranking_percentile=percentile_for_rank(rank, total),
+        ))
+    StartupScore.objects.bulk_update(updates, ['cb_rank', 'ranking_percentile'], batch_size=batch_size)
+
+
+def assign_ranks(batch_size=2000):
+    """
+    Recalcula el CB Rank y el percentil de todas las startups con score.
+    Retorna el número de startups rankeadas.
+    """
+    total = StartupScore.objects.count()
+    if not total:
+        return 0
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            _assign_ranks_postgres(total)
+        else:
+            _assign_ranks_sorted(total, batch_size)
+    return total
+
+
+def get_rank(startup_id):
+    """
+    Lookup O(1) (por clave primaria) del rank y percentil de una startup.
+    Retorna (cb_rank, ranking_percentile) o None si aún no tiene score.
+    """
+    return StartupScore.objects.filter(startup_id=startup_id).values_list(
+        'cb_rank', 'ranking_percentile'
+    ).first()
@@ -0,0 +1,169 @@
+"""
+Motor de scoring masivo (vectorizado) para startups
+Lee las columnas necesarias de todas las startups en una sola query,
+calcula Growth/Heat Score con lookups por buckets en NumPy, escribe
+los resultados en StartupScore con upserts por bloques y reasigna el
+ranking global (ver ranking_service).
+
+Las tablas de umbrales replican exactamente las cadenas if/elif de
+Startup.calculate_growth_score() y Startup.calculate_heat_score().
+"""
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.utils import timezone
+
+from .models import Industry, Startup, StartupQuerySet, StartupScore
+from .ranking_service import assign_ranks
+from .score_service import GROWTH_WEIGHT, HEAT_WEIGHT
+
+
+# Umbrales (>=) y puntos por bucket; el primer punto aplica a valores > 0
+# por debajo del primer umbral.
+GROWTH_REVENUE_BUCKETS = ([1000, 10000, 50000, 100000], [8, 12, 18, 22, 25])
+GROWTH_FUNDING_BUCKETS = ([100000, 1000000, 5000000, 10000000], [5, 10, 15, 18, 20])
+GROWTH_EMPLOYEES_BUCKETS = ([5, 10, 20, 50, 100], [2, 5, 8, 11, 13, 15])
+HEAT_REVENUE_BUCKETS = ([1000, 10000], [15, 20, 25])
+
+# Días desde la última actualización (<=) y puntos
+HEAT_RECENCY_BUCKETS = ([7, 30, 90], [30, 20, 10, 5])
+
+SCORE_COLUMNS = [
+    'id', 'stage', 'monthly_revenue', 'total_funding_raised', 'employees_count',
+    'updated_at', 'is_fundraising', 'seeking_amount', 'industry_id', 'profile_completeness',
+]
+
+
+def bucket_points(values, buckets, mask):
+    """
+    Asigna puntos por bucket a un array de valores.
+    `mask` indica qué filas califican (las demás reciben 0 puntos).
+    """
+    thresholds, points = buckets
+    index = np.searchsorted(np.asarray(thresholds, dtype=float), values, side='right')
+    return np.where(mask, np.asarray(points)[index], 0)
+
+
+def load_columns():
+    """Carga las columnas de scoring de todas las startups en arrays (una sola query)"""
+    rows = list(
+        Startup.objects.order_by().annotate(
+            profile_completeness=StartupQuerySet.profile_completeness_expression()
+        ).values_list(*SCORE_COLUMNS)
+    )
+    if not rows:
+        return None
+
+    columns = dict(zip(SCORE_COLUMNS, zip(*rows)))
+
+    def numeric(name):
+        return np.array([float(v) if v is not None else np.nan for v in columns[name]], dtype=float)
+
+    updated_at = np.array(
+        [timezone.make_naive(v, dt_timezone.utc) if v else None for v in columns['updated_at']],
+        dtype='datetime64[us]'
+    )
+    return {
+        'id': np.array(columns['id'], dtype=np.int64),
+        'stage': np.array(columns['stage'], dtype=object),
+        'monthly_revenue': numeric('monthly_revenue'),
+        'total_funding_raised': numeric('total_funding_raised'),
+        'employees_count': numeric('employees_count'),
+        'updated_at': updated_at,
+        'is_fundraising': np.array(columns['is_fundraising'], dtype=bool),
+        'seeking_amount': numeric('seeking_amount'),
+        'industry_id': np.array([v or 0 for v in columns['industry_id']], dtype=np.int64),
+        'profile_completeness': np.array(columns['profile_completeness'], dtype=np.int64),
+    }
+
+
+def compute_growth_scores(cols):
+    """Growth Score vectorizado (ver Startup.calculate_growth_score)"""
+    stage_points = np.array(
+        [Startup.STAGE_GROWTH_SCORES.get(stage, 0) for stage in Startup.STAGE_GROWTH_SCORES]
+    )
+    stage_index = {stage: i for i, stage in enumerate(Startup.STAGE_GROWTH_SCORES)}
+    stage_codes = np.array([stage_index.get(stage, -1) for stage in cols['stage']], dtype=np.int64)
+    score = np.where(stage_codes >= 0, stage_points[stage_codes], 0)
+
+    revenue = np.nan_to_num(cols['monthly_revenue'])
+    score = score + bucket_points(revenue, GROWTH_REVENUE_BUCKETS, revenue > 0)
+
+    funding = np.nan_to_num(cols['total_funding_raised'])
+    score = score + bucket_points(funding, GROWTH_FUNDING_BUCKETS, funding > 0)
+
+    employees = np.nan_to_num(cols['employees_count'])
+    score = score + bucket_points(employees, GROWTH_EMPLOYEES_BUCKETS, employees != 0)
+
+    score = score + cols['profile_completeness']
+    return np.minimum(score, 100)
+
+
+def compute_heat_scores(cols, now=None):
+    """Heat Score vectorizado (ver Startup.calculate_heat_score)"""
+    now = np.datetime64(timezone.make_naive(now or timezone.now(), dt_timezone.utc), 'us')
+
+    # Factor 1: actividad reciente (<= días, por eso side='left')
+    updated_at = cols['updated_at']
+    has_update = ~np.isnat(updated_at)
+    days = (now - np.where(has_update, updated_at, now)) // np.timedelta64(1, 'D')
+    thresholds, points = HEAT_RECENCY_BUCKETS
+    recency_index = np.searchsorted(np.asarray(thresholds), days, side='left')
+    score = np.where(has_update, np.asarray(points)[recency_index], 0)
+
+    # Factor 2: fundraising
+    seeking = np.nan_to_num(cols['seeking_amount'])
+    score = score + np.where(cols['is_fundraising'], 25, np.where(seeking != 0, 15, 0))
+
+    # Factor 3: ingresos
+    revenue = np.nan_to_num(cols['monthly_revenue'])
+    score = score + bucket_points(revenue, HEAT_REVENUE_BUCKETS, revenue > 0)
+
+    # Factor 4: industria trending (mapa id -> puntos con una sola query)
+    industry_points = {0: 0}
+    for industry_id, name in Industry.objects.values_list('id', 'name'):
+        trending = any(trend in name for trend in Startup.TRENDING_INDUSTRIES)
+        industry_points[industry_id] = 20 if trending else 10
+    score = score + np.array([industry_points.get(i, 0) for i in cols['industry_id']], dtype=np.int64)
+
+    return np.minimum(score, 100)
+
+
+def recompute_all_scores(batch_size=2000, now=None):
+    """
+    Recalcula el score de todas las startups, lo guarda en StartupScore
+    y reasigna el ranking global en una pasada.
+    Retorna el número de startups procesadas.
+    """
+    cols = load_columns()
+    if cols is None:
+        return 0
+
+    now = now or timezone.now()
+    growth = compute_growth_scores(cols)
+    heat = compute_heat_scores(cols, now=now)
+    combined = (growth * GROWTH_WEIGHT) + (heat * HEAT_WEIGHT)
+
+    total = len(cols['id'])
+    for start in range(0, total, batch_size):
+        end = start + batch_size
+        StartupScore.objects.bulk_create(
+            [
+                StartupScore(
+                    startup_id=int(startup_id),
+                    growth_score=int(g),
+                    heat_score=int(h),
+                    combined_score=float(c),
+                    computed_at=now,
+                )
+                for startup_id, g, h, c in zip(
+                    cols['id'][start:end], growth[start:end], heat[start:end], combined[start:end]
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=['startup'],
+            update_fields=['growth_score', 'heat_score', 'combined_score', 'computed_at'],
+        )
+
+    assign_ranks(batch_size=batch_size)
+    return total
@@ -0,0 +1,53 @@
+"""
+Servicio de scores materializados para startups
+Mantiene la tabla StartupScore sincronizada con los datos de cada Startup.
+Guardar una startup recalcula su fila; el heat score depende además del
+tiempo desde updated_at, que avanza sin que nadie guarde, así que el cron
+de render.yaml corre recompute_scores cada hora para todas las startups.
+"""
+from django.utils import timezone
+
+from .models import StartupScore
+
+
+# Pesos del score combinado (growth 60%, heat 40%)
+GROWTH_WEIGHT = 0.6
+HEAT_WEIGHT = 0.4
+
+
+def combine_scores(growth_score, heat_score):
+    """Score combinado usado para ordenar y rankear startups"""
+    return (growth_score * GROWTH_WEIGHT) + (heat_score * HEAT_WEIGHT)
+
+
+def refresh_startup_score(startup):
+    """
+    Recalcula y guarda growth, heat y combined score de una startup.
+    No toca el rank: cb_rank y ranking_percentile solo los asigna la pasada
+    en bloque (ranking_service.assign_ranks, comando recompute_scores), así
+    guardar una startup no cuenta sobre toda la tabla. Una startup nueva
+    queda sin rank (None) hasta la siguiente pasada.
+    """
+    growth_score = startup.calculate_growth_score()
+    heat_score = startup.calculate_heat_score()
+
+    score, _ = StartupScore.objects.update_or_create(
+        startup=startup,
+        defaults={
+            'growth_score': growth_score,
+            'heat_score': heat_score,
+            'combined_score': combine_scores(growth_score, heat_score),
+            'computed_at': timezone.now(),
+        }
+    )
+    return score
+
+
+def get_startup_score(startup):
+    """
+    Devuelve el score materializado de la startup, calculándolo si aún no existe
+    """
+    try:
+        return startup.score
+    except StartupScore.DoesNotExist:
+        return refresh_startup_score(startup)
@@ -0,0 +1,195 @@
+"""
+Servicio de búsqueda full-text de startups e inversores
+En PostgreSQL usa las columnas search_vector (tsvector ponderado con índice
+GIN) de Startup e InvestorProfile; en SQLite tablas espejo FTS5
+(core_startup_fts, core_investorprofile_fts, rowid = id del registro).
+Ambos se sincronizan desde los signals y los resultados se ordenan por
+relevancia (anotación `search_rank`).
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .models import InvestorProfile, Startup
+
+
+FTS_TABLE = 'core_startup_fts'
+INVESTOR_FTS_TABLE = 'core_investorprofile_fts'
+SEARCH_CONFIG = 'simple'
+
+# Pesos por campo: nombre > tagline > descripción
+SEARCH_WEIGHTS = (
+    ('company_name', 'A', 10.0),
+    ('tagline', 'B', 5.0),
+    ('description', 'C', 1.0),
+)
+
+# Inversores: fondo y nombre de la persona > tesis
+INVESTOR_SEARCH_WEIGHTS = (
+    ('fund_name', 'A', 10.0),
+    ('full_name', 'A', 10.0),
+    ('thesis', 'B', 2.0),
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _weighted_vector(values, weights):
+    """Suma de SearchVector ponderados; `values` mapea campo -> expresión"""
+    vector = None
+    for field, weight, _ in weights:
+        part = SearchVector(values[field], weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def _fts_replace(table, pk, values, weights):
+    columns = [field for field, _, _ in weights]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+        cursor.execute(
+            f'INSERT INTO {table} (rowid, {", ".join(columns)}) VALUES (%s{", %s" * len(columns)})',
+            [pk] + [values[column] or '' for column in columns],
+        )
+
+
+def _fts_delete(table, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+
+
+def index_startup(startup):
+    """Actualiza el índice de búsqueda de una startup"""
+    if connection.vendor == 'postgresql':
+        values = {field: field for field, _, _ in SEARCH_WEIGHTS}
+        Startup.objects.filter(pk=startup.pk).update(
+            search_vector=_weighted_vector(values, SEARCH_WEIGHTS)
+        )
+    elif connection.vendor == 'sqlite':
+        values = {field: getattr(startup, field) for field, _, _ in SEARCH_WEIGHTS}
+        _fts_replace(FTS_TABLE, startup.pk, values, SEARCH_WEIGHTS)
+
+
+def remove_startup(startup_id):
+    """Elimina una startup del índice (en PostgreSQL la fila ya no existe)"""
+    if connection.vendor == 'sqlite':
+        _fts_delete(FTS_TABLE, startup_id)
+
+
+def index_investor(investor):
+    """Actualiza el índice de búsqueda de un inversor (incluye el nombre del usuario)"""
+    full_name = investor.user.get_full_name()
+    if connection.vendor == 'postgresql':
+        values = {'fund_name': 'fund_name', 'full_name': Value(full_name), 'thesis': 'thesis'}
+        InvestorProfile.objects.filter(pk=investor.pk).update(
+            search_vector=_weighted_vector(values, INVESTOR_SEARCH_WEIGHTS)
+        )
+    elif connection.vendor == 'sqlite':
+        values = {'fund_name': investor.fund_name, 'full_name': full_name, 'thesis': investor.thesis}
+        _fts_replace(INVESTOR_FTS_TABLE, investor.pk, values, INVESTOR_SEARCH_WEIGHTS)
+
+
+def remove_investor(investor_id):
+    if connection.vendor == 'sqlite':
+        _fts_delete(INVESTOR_FTS_TABLE, investor_id)
+
+
+def _fts5_query(query):
+    """
+    Convierte el texto del usuario en una expresión FTS5 segura:
+    cada palabra entre comillas (AND implícito) y la última como prefijo
+    """
+    tokens = TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _no_results(queryset):
+    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _search_sqlite(queryset, query, table, weights):
+    """
+    El MATCH va dentro de la query del queryset (rowid IN ...), así los
+    filtros del llamador (is_public, facetas) se aplican junto con la
+    búsqueda y no sobre un top-N ya truncado. La relevancia es una
+    subquery correlacionada por rowid que solo se evalúa en las coincidencias.
+    """
+    match = _fts5_query(query)
+    if match is None:
+        return _no_results(queryset)
+
+    bm25_weights = ', '.join(str(w) for _, _, w in weights)
+    pk_column = f'"{queryset.model._meta.db_table}"."{queryset.model._meta.pk.column}"'
+    # bm25() es menor cuanto más relevante: se invierte para ordenar descendente
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT -bm25({table}, {bm25_weights}) FROM {table} '
+            f'WHERE {table} MATCH %s AND rowid = {pk_column}',
+            [match],
+            output_field=FloatField(),
+        )
+    )
+
+
+def _search_postgres(queryset, query):
+    """
+    ts_rank devuelve real (float4): se castea a double precision para que
+    el valor que vuelve en el cursor (float de Python) compare igual en el
+    keyset; si no, el desempate por igualdad nunca coincide y se repiten o
+    saltan filas al paginar por relevancia
+    """
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=search_query).annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+    )
+
+
+def search_startups(queryset, query):
+    """
+    Filtra `queryset` (de Startup) por texto y anota `search_rank`
+    (mayor = más relevante).
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, query)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, query, FTS_TABLE, SEARCH_WEIGHTS)
+
+    # Otros motores: búsqueda simple sin índice
+    return queryset.filter(
+        Q(company_name__icontains=query) |
+        Q(description__icontains=query) |
+        Q(tagline__icontains=query)
+    ).annotate(search_rank=Value(1.0, output_field=FloatField()))
+
+
+def search_investors(queryset, query):
+    """Igual que search_startups pero sobre un queryset de InvestorProfile"""
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, query)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, query, INVESTOR_FTS_TABLE, INVESTOR_SEARCH_WEIGHTS)
+
+    return queryset.filter(
+        Q(fund_name__icontains=query) |
+        Q(thesis__icontains=query) |
+        Q(user__first_name__icontains=query) |
+        Q(user__last_name__icontains=query)
+    ).annotate(search_rank=Value(1.0, output_field=FloatField()))
@@ -0,0 +1,263 @@
+"""
+Signals de la app core
+Mantienen sincronizadas las tablas derivadas (scores materializados,
+índice de búsqueda, conteos de facetas, autocompletado, matches inversor-startup,
+snapshot de estadísticas), el estado cacheado por los sockets de chat y los
+deltas que reciben los sockets de notificaciones
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import autocomplete_service
+from .models import Conversation, Event, InvestorProfile, Notification, Startup, StartupScore, UserProfile
+from .notification_service import record_created, record_deleted
+from .score_service import refresh_startup_score
+from .search_service import index_investor, index_startup, remove_investor, remove_startup
+from .facet_service import invalidate_facets
+from .match_service import (
+    INVESTOR_MATCH_INPUTS, STARTUP_MATCH_INPUTS,
+    refresh_investor_matches, refresh_startup_matches,
+)
+from .stats_service import invalidate_ecosystem_snapshot
+
+
+def _fields_changed(instance, fields, update_fields=None):
+    """
+    Dirty check previo al guardado: True si la instancia es nueva o si algún
+    campo de `fields` difiere de la fila guardada (una lectura por pk, y
+    ninguna si update_fields no incluye esos campos)
+    """
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return False
+    if instance._state.adding or instance.pk is None:
+        return True
+    attnames = [instance._meta.get_field(name).attname for name in fields]
+    stored = type(instance)._base_manager.filter(pk=instance.pk).values_list(*attnames).first()
+    return stored != tuple(getattr(instance, attname) for attname in attnames)
+
+
+@receiver(post_save, sender=Startup)
+def update_startup_score(sender, instance, raw=False, **kwargs):
+    """
+    Recalcula el score materializado cada vez que se guarda una startup. Al
+    cargar fixtures (raw) solo asegura que exista la fila: el directorio
+    ordena con join interno sobre StartupScore.
+    """
+    if raw:
+        StartupScore.objects.get_or_create(startup_id=instance.pk)
+        return
+    refresh_startup_score(instance)
+
+
+@receiver(post_save, sender=Startup)
+def update_startup_search_index(sender, instance, raw=False, **kwargs):
+    """Reindexa la startup para la búsqueda full-text"""
+    if raw:
+        return
+    index_startup(instance)
+
+
+@receiver(post_delete, sender=Startup)
+def remove_startup_search_index(sender, instance, **kwargs):
+    remove_startup(instance.pk)
+
+
+@receiver(post_save, sender=InvestorProfile)
+def update_investor_search_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_investor(instance)
+
+
+@receiver(post_delete, sender=InvestorProfile)
+def remove_investor_search_index(sender, instance, **kwargs):
+    remove_investor(instance.pk)
+
+
+# Campos de User que aparecen en los índices (el login solo guarda last_login)
+USER_INDEXED_FIELDS = {'first_name', 'last_name', 'is_active'}
+
+
+def _user_index_changed(update_fields):
+    return update_fields is None or bool(USER_INDEXED_FIELDS & set(update_fields))
+
+
+@receiver(post_save, sender=User)
+def update_user_investor_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    """El nombre del usuario forma parte del índice de su perfil de inversor"""
+    if raw or not _user_index_changed(update_fields):
+        return
+    investor = InvestorProfile.objects.filter(user=instance).first()
+    if investor:
+        investor.user = instance
+        index_investor(investor)
+
+
+@receiver(post_save, sender=Startup)
+@receiver(post_delete, sender=Startup)
+def invalidate_startup_facets(sender, raw=False, **kwargs):
+    """Cualquier cambio en startups invalida los conteos de facetas cacheados"""
+    if raw:
+        return
+    invalidate_facets()
+
+
+# Autocompletado (índice de prefijos en memoria)
+
+@receiver(post_save, sender=Startup)
+def update_startup_autocomplete(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    autocomplete_service.update_startup(instance)
+
+
+@receiver(post_save, sender=InvestorProfile)
+def update_investor_autocomplete(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    autocomplete_service.update_investor(instance)
+
+
+@receiver(post_save, sender=User)
+def update_user_autocomplete(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _user_index_changed(update_fields):
+        return
+    autocomplete_service.update_user(instance)
+
+
+@receiver(post_delete, sender=Startup)
+def remove_startup_autocomplete(sender, instance, **kwargs):
+    autocomplete_service.remove_entry('startup', instance.pk)
+
+
+@receiver(post_delete, sender=InvestorProfile)
+def remove_investor_autocomplete(sender, instance, **kwargs):
+    autocomplete_service.remove_entry('investor', instance.pk)
+
+
+# Índice de matches inversor-startup
+# Solo se recalcula si cambió un campo que afecta el puntaje, y después del
+# commit para no alargar la transacción del guardado (rebuild_matches
+# reconstruye el índice completo si hiciera falta)
+
+@receiver(pre_save, sender=Startup)
+def check_startup_match_inputs(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    instance._match_inputs_changed = _fields_changed(instance, STARTUP_MATCH_INPUTS, update_fields)
+
+
+@receiver(pre_save, sender=InvestorProfile)
+def check_investor_match_inputs(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    instance._match_inputs_changed = _fields_changed(instance, INVESTOR_MATCH_INPUTS, update_fields)
+
+
+@receiver(post_save, sender=Startup)
+def update_startup_matches(sender, instance, raw=False, **kwargs):
+    if raw or not instance.__dict__.pop('_match_inputs_changed', True):
+        return
+    transaction.on_commit(lambda: refresh_startup_matches(instance))
+
+
+@receiver(post_save, sender=InvestorProfile)
+def update_investor_matches(sender, instance, raw=False, **kwargs):
+    if raw or not instance.__dict__.pop('_match_inputs_changed', True):
+        return
+    transaction.on_commit(lambda: refresh_investor_matches(instance))
+
+
+# Snapshot de estadísticas del ecosistema
+
+@receiver(post_save, sender=Startup)
+@receiver(post_delete, sender=Startup)
+@receiver(post_save, sender=InvestorProfile)
+@receiver(post_delete, sender=InvestorProfile)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_ecosystem_stats(sender, raw=False, **kwargs):
+    """Los cambios en startups, inversores, perfiles o eventos refrescan el snapshot"""
+    if raw:
+        return
+    invalidate_ecosystem_snapshot()
+
+
+# Estado cacheado por ChatConsumer (nombre y avatar de los participantes)
+# Solo cuando el nombre o la imagen cambian de verdad (el login guarda
+# last_login y muchos formularios guardan el perfil completo), después del
+# commit y con todos los group_send en un solo paso por el event loop
+
+CHAT_USER_FIELDS = ('first_name', 'last_name')
+CHAT_PROFILE_FIELDS = ('profile_image',)
+
+
+async def _group_send_all(channel_layer, groups, event):
+    await asyncio.gather(*(channel_layer.group_send(group, event) for group in groups))
+
+
+def _notify_chat_participant_updated(user_id):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    conversation_ids = Conversation.objects.filter(
+        Q(participant1_id=user_id) | Q(participant2_id=user_id)
+    ).values_list('id', flat=True)
+    groups = [f'chat_{conversation_id}' for conversation_id in conversation_ids]
+    if groups:
+        async_to_sync(_group_send_all)(channel_layer, groups, {'type': 'participant_updated', 'user_id': user_id})
+
+
+@receiver(pre_save, sender=UserProfile)
+def check_chat_avatar(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    instance._chat_fields_changed = _fields_changed(instance, CHAT_PROFILE_FIELDS, update_fields)
+
+
+@receiver(pre_save, sender=User)
+def check_chat_user_name(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    instance._chat_fields_changed = _fields_changed(instance, CHAT_USER_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=UserProfile)
+def refresh_chat_avatar(sender, instance, raw=False, created=False, **kwargs):
+    """Los sockets abiertos recargan el avatar cuando cambia la imagen de perfil"""
+    if raw or created or not instance.__dict__.pop('_chat_fields_changed', True):
+        return
+    user_id = instance.user_id
+    transaction.on_commit(lambda: _notify_chat_participant_updated(user_id))
+
+
+@receiver(post_save, sender=User)
+def refresh_chat_user_name(sender, instance, raw=False, created=False, **kwargs):
+    """Los sockets abiertos recargan el nombre cuando cambia el usuario"""
+    if raw or created or not instance.__dict__.pop('_chat_fields_changed', True):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: _notify_chat_participant_updated(user_id))
+
+
+# Socket de notificaciones (bulk_create y update() publican desde su llamador)
+
+@receiver(post_save, sender=Notification)
+def record_notification_created(sender, instance, created=False, raw=False, **kwargs):
+    if raw or not created:
+        return
+    record_created([instance])
+
+
+@receiver(post_delete, sender=Notification)
+def record_notification_deleted(sender, instance, **kwargs):
+    record_deleted(instance.user_id, [instance.pk], 0 if instance.is_read else -1)
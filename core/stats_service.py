@@ -0,0 +1,80 @@
+"""
+Snapshot de estadísticas del ecosistema
+Las métricas globales (startups, inversores, funding, fundraising, altas
+del mes) se calculan con agregados condicionales en una pasada y se guardan
+en cache junto con la actividad reciente compartida por el dashboard y el
+home. El snapshot expira tras ECOSYSTEM_STATS_TTL segundos y se invalida
+desde los signals cuando cambian startups, inversores, perfiles o eventos.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from .models import Event, Industry, InvestorProfile, Startup, UserProfile
+
+
+ECOSYSTEM_STATS_KEY = 'ecosystem_stats:snapshot'
+ECOSYSTEM_STATS_TTL = 60
+
+
+def _startup_stats(now):
+    """Todas las métricas de startups en un único agregado condicional"""
+    month_start = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    public = Q(is_public=True)
+    fundraising = public & Q(is_fundraising=True)
+    stats = Startup.objects.aggregate(
+        total_startups=Count('pk', filter=public),
+        total_funding=Sum('total_funding_raised', filter=public),
+        total_seeking=Sum('seeking_amount', filter=fundraising),
+        active_fundraising=Count('pk', filter=fundraising),
+        new_this_month=Count('pk', filter=public & Q(created_at__gte=month_start)),
+        avg_valuation=Avg('valuation', filter=public),
+    )
+    stats['total_funding'] = stats['total_funding'] or 0
+    stats['total_seeking'] = stats['total_seeking'] or 0
+    stats['avg_valuation'] = stats['avg_valuation'] or 0
+    return stats
+
+
+def compute_ecosystem_snapshot(now=None):
+    """Calcula el snapshot completo (sin cache)"""
+    now = now or timezone.now()
+    stats = _startup_stats(now)
+    stats['total_investors'] = InvestorProfile.objects.filter(is_active=True).count()
+    stats['total_advisors'] = UserProfile.objects.filter(user_type='advisor').count()
+
+    public_startups = Startup.objects.filter(is_public=True).select_related('industry')
+    return {
+        'stats': stats,
+        'recent_startups': list(public_startups.order_by('-created_at')[:6]),
+        'recent_funding': list(public_startups.filter(total_funding_raised__gt=0).order_by('-updated_at')[:5]),
+        'trending_industries': list(
+            Industry.objects.annotate(startup_count=Count('startup')).order_by('-startup_count')[:5]
+        ),
+        'upcoming_events': list(
+            Event.objects.filter(status='published', start_datetime__gte=now).order_by('start_datetime')[:3]
+        ),
+        # El home muestra los últimos eventos publicados (también pasados),
+        # el dashboard solo los próximos
+        'published_events': list(Event.objects.filter(status='published')[:3]),
+        'featured_startups': list(public_startups.filter(featured=True)[:6]),
+        'featured_investors': list(
+            InvestorProfile.objects.filter(featured=True, is_active=True).select_related('user')[:6]
+        ),
+        'computed_at': now,
+    }
+
+
+def get_ecosystem_snapshot():
+    """Snapshot cacheado; se recalcula si expiró o fue invalidado"""
+    snapshot = cache.get(ECOSYSTEM_STATS_KEY)
+    if snapshot is None:
+        snapshot = compute_ecosystem_snapshot()
+        cache.set(ECOSYSTEM_STATS_KEY, snapshot, ECOSYSTEM_STATS_TTL)
+    return snapshot
+
+
+def invalidate_ecosystem_snapshot():
+    """Al confirmar la transacción, para que un request concurrente no vuelva a cachear datos viejos"""
+    transaction.on_commit(lambda: cache.delete(ECOSYSTEM_STATS_KEY))
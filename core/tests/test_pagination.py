@@ -0,0 +1,76 @@
+"""
+Paginación por cursor de los directorios (startups e inversores) por relevancia
+Recorre todas las páginas cruzando empates de search_rank: cada resultado
+debe aparecer exactamente una vez. En PostgreSQL ejercita ts_rank (real,
+casteado a double precision); en SQLite el bm25 de FTS5.
+"""
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Industry, InvestorProfile, Startup, UserProfile
+from core.pagination import paginate_keyset
+from core.search_service import search_investors, search_startups
+
+
+PAGE_SIZE = 3
+
+
+class RelevancePaginationMixin:
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('founder', password='x')
+        founder = UserProfile.objects.create(user=user, user_type='founder')
+        industry = Industry.objects.create(name='AI', slug='ai')
+        # Textos idénticos: el mismo rank, desempata el id
+        for i in range(8):
+            Startup.objects.create(
+                founder=founder, company_name='Acme Robotics', tagline='Robots',
+                description='Robots industriales', stage='mvp', industry=industry,
+            )
+        # Más relevantes, también empatadas entre sí
+        for i in range(3):
+            Startup.objects.create(
+                founder=founder, company_name='Acme Robotics', tagline='Acme robots',
+                description='Acme Acme robots industriales', stage='mvp', industry=industry,
+            )
+        for i in range(7):
+            investor = User.objects.create_user(f'investor{i}', password='x', first_name='Ana', last_name='Pérez')
+            InvestorProfile.objects.create(
+                user=investor, fund_name='Acme Ventures', investor_type='vc',
+                thesis='Robots' if i % 2 else 'Robots y robots industriales',
+            )
+
+    def walk(self, queryset, sort_field):
+        seen, cursor = [], None
+        while True:
+            page = paginate_keyset(queryset, sort_field, cursor=cursor, page_size=PAGE_SIZE)
+            seen.extend(item.pk for item in page)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_startup_relevance_pages_cross_ties(self):
+        startups = search_startups(Startup.objects.filter(is_public=True), 'acme robots')
+        seen = self.walk(startups, 'search_rank')
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertCountEqual(seen, Startup.objects.values_list('pk', flat=True))
+
+    def test_investor_relevance_pages_cross_ties(self):
+        investors = search_investors(InvestorProfile.objects.all(), 'acme robots')
+        seen = self.walk(investors, 'search_rank')
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertCountEqual(seen, InvestorProfile.objects.values_list('pk', flat=True))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'ts_rank solo existe en PostgreSQL')
+class PostgresRelevancePaginationTest(RelevancePaginationMixin, TestCase):
+    pass
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 solo en SQLite')
+class SqliteRelevancePaginationTest(RelevancePaginationMixin, TestCase):
+    pass
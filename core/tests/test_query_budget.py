@@ -0,0 +1,100 @@
+"""
+Presupuestos de queries (settings.QUERY_BUDGETS) como gate de CI
+Cada vista con presupuesto se pide con suficientes filas relacionadas
+(ROWS) como para que un N+1 lo supere.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import (
+    ChatConversation, ChatMessage, ConnectionRequest, Conversation, Industry,
+    InvestorProfile, Message, Startup, UserProfile,
+)
+from core.query_budget import assert_view_within_budget
+
+
+ROWS = 20
+
+
+# Sin collectstatic no hay manifest: storage simple para renderizar los templates
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class QueryBudgetTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        industry = Industry.objects.create(name='AI', slug='ai')
+        cls.founder = _user('founder', 'founder')
+        cls.startup = Startup.objects.create(
+            founder=cls.founder.profile, company_name='Acme', tagline='Tagline',
+            description='Descripción', stage='mvp', industry=industry, is_fundraising=True,
+        )
+        cls.investor = _user('investor', 'investor')
+        InvestorProfile.objects.create(
+            user=cls.investor, fund_name='Acme Ventures', investor_type='vc', investment_stages=['mvp'],
+        )
+
+        cls.visitor = _user('visitor', 'founder')
+        for i in range(ROWS):
+            other = _user(f'peer{i}', 'investor' if i % 2 else 'founder')
+            if i % 2:
+                InvestorProfile.objects.create(
+                    user=other, fund_name=f'Fund {i}', investor_type='vc', investment_stages=['idea'],
+                )
+            ConnectionRequest.objects.create(sender=other, receiver=cls.founder, status='accepted')
+            conversation = Conversation.objects.create(participant1=cls.founder, participant2=other)
+            Message.objects.create(conversation=conversation, sender=other, content=f'Hola {i}')
+            Startup.objects.create(
+                founder=other.profile, company_name=f'Startup {i}', tagline='Tagline',
+                description='Descripción', stage='idea', industry=industry,
+            )
+            chat = ChatConversation.objects.create(user=cls.founder, title=f'Chat {i}')
+            ChatMessage.objects.create(conversation=chat, role='user', content='Hola')
+
+    def setUp(self):
+        # Los paneles del dashboard y el snapshot de estadísticas se cachean
+        cache.clear()
+
+    def assertWithinBudget(self, user, path):
+        self.client.force_login(user)
+        response = assert_view_within_budget(self.client, path)
+        self.assertLess(response.status_code, 400, path)
+
+    def test_home(self):
+        self.assertWithinBudget(self.founder, reverse('core:home'))
+
+    def test_dashboard(self):
+        self.assertWithinBudget(self.founder, reverse('core:dashboard'))
+
+    def test_dashboard_panels(self):
+        for user, panels in ((self.founder, ('stats', 'featured', 'sidebar', 'founder')),
+                             (self.investor, ('investor', 'community'))):
+            for panel in panels:
+                with self.subTest(panel=panel):
+                    self.assertWithinBudget(user, reverse('core:dashboard_panel', args=[panel]))
+
+    def test_startup_profile(self):
+        self.assertWithinBudget(self.visitor, reverse('core:startup_profile', args=[self.startup.id]))
+
+    def test_messages_inbox(self):
+        self.assertWithinBudget(self.founder, reverse('core:messages_inbox'))
+
+    def test_get_conversations(self):
+        self.assertWithinBudget(self.founder, reverse('core:get_conversations'))
+
+    def test_my_connections(self):
+        self.assertWithinBudget(self.founder, reverse('core:my_connections'))
+
+    def test_every_budget_is_covered(self):
+        """Un presupuesto nuevo en settings necesita su test aquí"""
+        covered = {'core:home', 'core:dashboard', 'core:dashboard_panel', 'core:startup_profile',
+                   'core:messages_inbox', 'core:get_conversations', 'core:my_connections'}
+        self.assertEqual(set(settings.QUERY_BUDGETS), covered)
+
+
+def _user(username, user_type):
+    user = User.objects.create_user(username, password='x', first_name=username.title(), last_name='Test')
+    UserProfile.objects.create(user=user, user_type=user_type)
+    return user
@@ -0,0 +1,91 @@
+"""
+Paridad entre las tres implementaciones del scoring: SQL
+(Startup.objects.with_scores), el motor masivo en NumPy (score_engine) y
+los métodos de Python del modelo, sobre startups aleatorias que incluyen
+cada valor de borde de los umbrales
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Industry, Startup, UserProfile
+from core.score_engine import compute_growth_scores, compute_heat_scores, load_columns
+
+
+# Valores en y alrededor de cada umbral de las fórmulas
+REVENUES = [None, 0, 1, 999, 1000, 9999, 10000, 49999, 50000, 99999, 100000, 2500000]
+FUNDING = [0, 1, 99999, 100000, 999999, 1000000, 4999999, 5000000, 9999999, 10000000, 50000000]
+EMPLOYEES = [None, 0, 1, 4, 5, 9, 10, 19, 20, 49, 50, 99, 100, 1000]
+SEEKING = [None, 0, 500000]
+# Días desde la última actualización (a mitad de día para no caer en un borde)
+UPDATE_AGES = [0, 3, 7, 8, 15, 30, 31, 60, 90, 91, 400]
+
+
+class ScoreParityTest(TestCase):
+    SAMPLE_SIZE = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(20240501)
+        user = User.objects.create_user('founder', password='x')
+        founder = UserProfile.objects.create(user=user, user_type='founder')
+        industries = [None] + [
+            Industry.objects.create(name=name, slug=name.lower())
+            for name in ('AI', 'FinTech', 'CleanTech', 'Retail', 'Logistics')
+        ]
+        stages = [code for code, _ in Startup.COMPANY_STAGES] + ['unknown']
+
+        for i in range(cls.SAMPLE_SIZE):
+            # Las primeras filas recorren todos los valores de borde; el resto es aleatorio
+            def pick(values):
+                return values[i] if i < len(values) else rng.choice(values)
+
+            startup = Startup.objects.create(
+                founder=founder,
+                company_name=f'Startup {i}',
+                tagline='Tagline',
+                description=rng.choice(['', 'Descripción']),
+                stage=pick(stages),
+                industry=pick(industries),
+                monthly_revenue=_decimal(pick(REVENUES)),
+                total_funding_raised=_decimal(pick(FUNDING)),
+                employees_count=pick(EMPLOYEES),
+                seeking_amount=_decimal(pick(SEEKING)),
+                is_fundraising=rng.random() < 0.4,
+                website=rng.choice(['', 'https://example.com']),
+                logo=rng.choice(['', 'startup_logos/logo.png']),
+                business_model=rng.choice(['', 'SaaS']),
+                problem_statement=rng.choice(['', 'Problema']),
+                solution_description=rng.choice(['', 'Solución']),
+                founded_date=rng.choice([None, date(2020, 1, 1)]),
+            )
+            # updated_at es auto_now: se fija aparte con update()
+            age = timedelta(days=pick(UPDATE_AGES), hours=12)
+            Startup.objects.filter(pk=startup.pk).update(updated_at=timezone.now() - age)
+
+    def test_sql_scores_match_python(self):
+        startups = Startup.objects.with_scores().select_related('industry')
+        self.assertEqual(len(startups), self.SAMPLE_SIZE)
+        for startup in startups:
+            with self.subTest(startup=startup.company_name):
+                self.assertEqual(startup.growth_score, startup.calculate_growth_score())
+                self.assertEqual(startup.heat_score, startup.calculate_heat_score())
+
+    def test_engine_scores_match_python(self):
+        cols = load_columns()
+        growth = dict(zip(cols['id'].tolist(), compute_growth_scores(cols).tolist()))
+        heat = dict(zip(cols['id'].tolist(), compute_heat_scores(cols).tolist()))
+        startups = Startup.objects.select_related('industry')
+        self.assertEqual(len(growth), self.SAMPLE_SIZE)
+        for startup in startups:
+            with self.subTest(startup=startup.company_name):
+                self.assertEqual(growth[startup.pk], startup.calculate_growth_score())
+                self.assertEqual(heat[startup.pk], startup.calculate_heat_score())
+
+
+def _decimal(value):
+    return None if value is None else Decimal(value)
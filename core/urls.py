@@ -14,17 +14,25 @@ urlpatterns = [
     
     # Dashboard y perfiles
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/panels/<str:panel>/', views.dashboard_panel, name='dashboard_panel'),
     
     # Startups
     path('startup/create/', views.create_startup, name='create_startup'),
     path('startup/<int:startup_id>/', views.startup_profile, name='startup_profile'),
     path('startups/', views.startup_directory, name='startup_directory'),
+    path('startups/page/', views.startup_directory_page, name='startup_directory_page'),
     
     # Investors
     path('investor/create/', views.investor_create, name='investor_create'),
     path('investors/', views.investor_directory, name='investor_directory'),
+    path('investors/page/', views.investor_directory_page, name='investor_directory_page'),
+    path('api/investors', views.investor_directory_json, name='investor_directory_json'),
     path('investor/<int:investor_id>/', views.investor_detail, name='investor_detail'),
     
+    # Autocompletado (typeahead) de los directorios
+    path('api/autocomplete', views.autocomplete_api, name='autocomplete'),
+    path('api/query-stats', views.query_stats_api, name='query_stats'),
+    
     # Eventos
     path('events/', views.events_list, name='events_list'),
     path('events/create/', views.create_event, name='create_event'),
@@ -65,6 +73,8 @@ urlpatterns = [
     # Sistema de Mensajería
     path('messages/', views.messages_inbox, name='messages_inbox'),
     path('messages/<int:conversation_id>/', views.conversation_detail, name='conversation_detail'),
+    path('messages/<int:conversation_id>/history/', views.conversation_history, name='conversation_history'),
+    path('api/conversations/<int:conversation_id>/messages', views.conversation_history_json, name='conversation_history_json'),
     
     # Sistema de Notificaciones
     path('notifications/', views.notifications_list, name='notifications_list'),
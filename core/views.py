@@ -5,10 +5,15 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.views.decorators.http import require_http_methods, require_POST
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, F, Count, Sum
 from django.db import models
 from django.utils import timezone
 from django.core.exceptions import PermissionDenied
+from django.urls import reverse
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from decimal import Decimal, InvalidOperation
 import json
 from .models import (
     Contact, Industry, UserProfile, Startup, InvestorProfile, 
@@ -16,16 +21,28 @@ from .models import (
     ConnectionRequest, Conversation, Message, Notification
 )
 from .startup_forms import StartupForm
+from .score_service import get_startup_score
+from .pagination import paginate_keyset, InvalidCursor
+from .search_service import search_investors, search_startups
+from .facet_service import apply_facet_filters, get_facet_counts, parse_facet_filters
+from .autocomplete_service import AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_KINDS, autocomplete
+from .stats_service import get_ecosystem_snapshot
+from .dashboard_panels import DASHBOARD_PANELS, panel_cache_key, role_panel
+from .query_budget import query_stats
+from .presence_service import online_user_ids
+from .notification_service import notify, record_read
 
 def home(request):
     """Homepage con estadísticas del ecosistema"""
+    snapshot = get_ecosystem_snapshot()
+    stats = snapshot['stats']
     context = {
-        'total_startups': Startup.objects.filter(is_public=True).count() or 25,
-        'total_investors': InvestorProfile.objects.filter(is_active=True).count() or 15,
-        'total_advisors': UserProfile.objects.filter(user_type='advisor').count() or 8,
-        'featured_startups': Startup.objects.filter(featured=True, is_public=True)[:6],
-        'featured_investors': InvestorProfile.objects.filter(featured=True, is_active=True)[:6],
-        'upcoming_events': Event.objects.filter(status='published')[:3],
+        'total_startups': stats['total_startups'] or 25,
+        'total_investors': stats['total_investors'] or 15,
+        'total_advisors': stats['total_advisors'] or 8,
+        'featured_startups': snapshot['featured_startups'],
+        'featured_investors': snapshot['featured_investors'],
+        'upcoming_events': snapshot['published_events'],
         'total_funding': '15M+'  # Hardcoded for now
     }
     return render(request, 'core/home.html', context)
@@ -341,186 +358,51 @@ def dashboard(request):
         )
         logger.info(f"Profile created successfully for user: {request.user.username}")
     
-    try:
-        logger.info("Starting to gather ecosystem statistics...")
-        # Estadísticas globales del ecosistema
-        total_startups = Startup.objects.filter(is_public=True).count()
-        logger.info(f"Total startups counted: {total_startups}")
-        
-        total_investors = InvestorProfile.objects.filter(is_active=True).count()
-        logger.info(f"Total investors counted: {total_investors}")
-        total_funding = Startup.objects.filter(is_public=True).aggregate(
-            total=Sum('total_funding_raised')
-        )['total'] or 0
-        logger.info(f"Total funding calculated: {total_funding}")
-        
-        total_seeking = Startup.objects.filter(
-            is_fundraising=True, 
-            is_public=True
-        ).aggregate(total=Sum('seeking_amount'))['total'] or 0
-        logger.info(f"Total seeking calculated: {total_seeking}")
-        
-        # Actividad reciente
-        logger.info("Gathering recent activity data...")
-        recent_startups = Startup.objects.filter(is_public=True).order_by('-created_at')[:6]
-        logger.info(f"Recent startups count: {recent_startups.count()}")
-        
-        recent_funding = Startup.objects.filter(
-            is_public=True,
-            total_funding_raised__gt=0
-        ).order_by('-updated_at')[:5]
-        logger.info(f"Recent funding count: {recent_funding.count()}")
-        
-        trending_industries = Industry.objects.annotate(
-            startup_count=Count('startup')
-        ).order_by('-startup_count')[:5]
-        logger.info(f"Trending industries count: {trending_industries.count()}")
-        
-        context = {
-            'profile': profile,
-            'user_type': profile.user_type,
-            # Estadísticas globales
-            'ecosystem_stats': {
-                'total_startups': total_startups,
-                'total_investors': total_investors,
-                'total_funding': total_funding,
-                'total_seeking': total_seeking,
-                'active_fundraising': Startup.objects.filter(is_fundraising=True, is_public=True).count(),
-                'new_this_month': Startup.objects.filter(
-                    created_at__month=timezone.now().month,
-                    is_public=True
-                ).count()
-            },
-            # Actividad reciente
-            'recent_activity': {
-                'recent_startups': recent_startups,
-                'recent_funding': recent_funding,
-                'trending_industries': trending_industries,
-                'upcoming_events': Event.objects.filter(
-                    status='published',
-                    start_datetime__gte=timezone.now()
-                ).order_by('start_datetime')[:3]
-            }
-        }
-    
-        
-        if profile.user_type == 'founder':
-            # Dashboard específico para founders
-            try:
-                startup = Startup.objects.get(founder=profile)
-                # Métricas del startup
-                context.update({
-                    'startup': startup,
-                    'startup_metrics': {
-                        'funding_progress': (startup.total_funding_raised / startup.seeking_amount * 100) if startup.seeking_amount else 0,
-                        'time_since_founded': (timezone.now().date() - startup.founded_date).days if startup.founded_date else 0,
-                        'years_since_founded': round((timezone.now().date() - startup.founded_date).days / 365.25, 1) if startup.founded_date else 0,
-                        'industry_rank': Startup.objects.filter(
-                            industry=startup.industry,
-                            total_funding_raised__gte=startup.total_funding_raised
-                        ).count() if startup.industry else 0
-                    },
-                    'recommended_investors': InvestorProfile.objects.filter(
-                        is_accepting_pitches=True,
-                        is_active=True,
-                        geographic_focus__in=['global', 'local']
-                    ).order_by('-fund_size')[:8],
-                    'similar_startups': Startup.objects.filter(
-                        industry=startup.industry,
-                        stage=startup.stage,
-                        is_public=True
-                    ).exclude(id=startup.id)[:5] if startup.industry else []
-                })
-            except Startup.DoesNotExist:
-                context['needs_startup'] = True
-                
-        elif profile.user_type == 'investor':
-            # Dashboard específico para inversores
-            try:
-                investor = InvestorProfile.objects.get(user=request.user)
-                # Deal flow y oportunidades
-                relevant_startups = Startup.objects.filter(
-                    is_fundraising=True,
-                    is_public=True
-                )
-                
-                # Obtener investment_stages con seguridad
-                investment_stages = investor.investment_stages if investor.investment_stages else []
-                
-                if investment_stages:
-                    relevant_startups = relevant_startups.filter(
-                        stage__in=investment_stages
-                    )
-                
-                context.update({
-                    'investor': investor,
-                    'deal_flow': {
-                        'new_opportunities': relevant_startups.order_by('-created_at')[:8],
-                        'matching_stage': relevant_startups.filter(
-                            stage__in=investment_stages
-                        ).count() if investment_stages else relevant_startups.count(),
-                        'in_range': relevant_startups.filter(
-                            seeking_amount__gte=investor.min_investment or 0,
-                            seeking_amount__lte=investor.max_investment or float('inf')
-                        ).count() if (investor.min_investment or investor.max_investment) else 0
-                    },
-                    'market_insights': {
-                        'avg_valuation': Startup.objects.filter(
-                            is_public=True,
-                            valuation__isnull=False
-                        ).aggregate(avg=Avg('valuation'))['avg'] or 0,
-                        'hot_industries': trending_industries
-                    }
-                })
-            except InvestorProfile.DoesNotExist:
-                context['needs_investor_profile'] = True
-                
-        else:  # advisor o community
-            # Dashboard para advisors y community members
-            context.update({
-                'discovery': {
-                    'featured_startups': Startup.objects.filter(
-                        featured=True,
-                        is_public=True
-                    ).order_by('-created_at')[:6],
-                    'top_funded': Startup.objects.filter(
-                        is_public=True,
-                        total_funding_raised__gt=0
-                    ).order_by('-total_funding_raised')[:5],
-                    'recently_launched': recent_startups
-                },
-                'network_opportunities': {
-                    'active_investors': InvestorProfile.objects.filter(
-                        is_active=True,
-                        is_accepting_pitches=True
-                    ).order_by('-fund_size')[:6],
-                    'growing_startups': Startup.objects.filter(
-                        is_public=True,
-                        stage__in=['growth', 'scale']
-                    ).order_by('-employees_count')[:6]
-                }
-            })
-        
-        logger.info("Successfully gathered all dashboard data, rendering template...")
-        return render(request, 'core/dashboard_new.html', context)
-        
-    except Exception as e:
-        logger.error(f"Error in dashboard view: {str(e)}", exc_info=True)
-        # En caso de error, crear un contexto básico de fallback
-        context = {
-            'profile': profile,
-            'user_type': profile.user_type,
-            'error_message': 'Error cargando el dashboard. Contacta soporte si persiste.',
-            'ecosystem_stats': {
-                'total_startups': 25,
-                'total_investors': 15,
-                'total_funding': 0,
-                'total_seeking': 0,
-                'active_fundraising': 5,
-                'new_this_month': 3
-            }
-        }
-        return render(request, 'core/dashboard_new.html', context)@login_required
+    # El shell solo resuelve el perfil; los paneles llegan por HTMX (dashboard_panel)
+    context = {
+        'profile': profile,
+        'user_type': profile.user_type,
+        'role_panel': role_panel(profile.user_type),
+    }
+    return render(request, 'core/dashboard_new.html', context)
+
+
+@login_required
+def dashboard_panel(request, panel):
+    """Fragmento HTMX de un panel del dashboard con su propia política de cache"""
+    import logging
+    logger = logging.getLogger('core')
+
+    config = DASHBOARD_PANELS.get(panel)
+    if config is None:
+        raise Http404("Panel no encontrado")
+
+    cache_key = panel_cache_key(panel, request.user)
+    html = cache.get(cache_key)
+    if html is None:
+        try:
+            profile, _ = UserProfile.objects.get_or_create(
+                user=request.user, defaults={'user_type': 'community'}
+            )
+            context = config['build'](request, profile)
+            # Los paneles compartidos se renderizan sin request para no filtrar datos del usuario
+            if config['scope'] == 'user':
+                html = render_to_string(config['template'], context, request=request)
+            else:
+                html = render_to_string(config['template'], context)
+        except Exception as e:
+            logger.error(f"Error rendering dashboard panel {panel}: {str(e)}", exc_info=True)
+            response = render(request, 'core/partials/dashboard_panel_error.html', {'panel': panel})
+            add_never_cache_headers(response)
+            return response
+        cache.set(cache_key, html, config['ttl'])
+
+    response = HttpResponse(html)
+    patch_cache_control(response, private=True, max_age=config['ttl'])
+    return response
+
+
+@login_required
 def investor_create(request):
     if not request.user.is_authenticated:
         return redirect('core:login')
@@ -652,94 +534,276 @@ def investor_detail(request, investor_id):
     
     return render(request, 'core/investor_detail.html', context)
 
-def startup_directory(request):
-    """Directorio público de startups con scores dinámicos"""
-    print("Entrando a startup_directory")
-    startups = Startup.objects.filter(is_public=True).order_by('-created_at')
-    print(f"Startups encontradas: {startups.count()}")
-    
-    # Filtros básicos
+# Orden soportado en el directorio: clave -> (expresión de orden, descendente por defecto)
+STARTUP_DIRECTORY_SORTS = {
+    'growth_score': (F('score__growth_score'), True),
+    'heat_score': (F('score__heat_score'), True),
+    'cb_rank': (F('score__cb_rank'), False),  # Rank más bajo = mejor
+    'funding': (F('total_funding_raised'), True),
+    'created_at': (F('created_at'), True),
+}
+# Órdenes sobre columnas de StartupScore: se paginan con la columna sin
+# envolver y su FK como desempate, así el índice compuesto (columna,
+# startup_id) resuelve orden y cursor sin recorrer toda la tabla
+STARTUP_SCORE_SORTS = {'growth_score', 'heat_score', 'cb_rank'}
+STARTUP_DIRECTORY_PAGE_SIZE = 24
+
+
+def _startup_directory_page(request):
+    """Arma una página (keyset) del directorio según los filtros del request"""
+    startups = Startup.objects.filter(is_public=True).select_related('score', 'industry')
+    
+    # Búsqueda full-text (anota search_rank por relevancia)
     search_query = request.GET.get('search')
+    sorts = STARTUP_DIRECTORY_SORTS
     if search_query:
-        startups = startups.filter(
-            Q(company_name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(tagline__icontains=search_query)
+        startups = search_startups(startups, search_query)
+        sorts = dict(STARTUP_DIRECTORY_SORTS, relevance=(F('search_rank'), True))
+    
+    # Facetas (industria, etapa, ingresos, fundraising)
+    facet_filters = parse_facet_filters(request.GET)
+    startups = apply_facet_filters(startups, facet_filters)
+    
+    # Ordenar en la base de datos sobre los scores materializados (StartupScore):
+    # columnas indexadas y estables entre páginas, a diferencia de la
+    # expresión calculada con `now`, que obligaba a un sort completo por página
+    default_sort = 'relevance' if search_query else 'growth_score'
+    sort_by = request.GET.get('sort', default_sort)
+    if sort_by not in sorts:
+        sort_by = default_sort
+    order = request.GET.get('order', 'desc')
+    sort_expression, descending = sorts[sort_by]
+    if order == 'asc':
+        descending = not descending
+    pk_field = 'pk'
+    if sort_by in STARTUP_SCORE_SORTS:
+        # Join interno: toda startup tiene su fila de score (migración 0015 y
+        # signals); las que aún no tienen rank quedan fuera del orden por rank
+        # hasta la próxima pasada de recompute_scores
+        startups = startups.filter(**{f'score__{sort_by}__isnull': False})
+        pk_field = 'score__startup_id'
+    startups = startups.annotate(directory_sort=sort_expression)
+    
+    try:
+        page = paginate_keyset(
+            startups, 'directory_sort',
+            descending=descending,
+            cursor=request.GET.get('cursor'),
+            page_size=STARTUP_DIRECTORY_PAGE_SIZE,
+            key=f'startups:{sort_by}:{order}',
+            pk_field=pk_field,
         )
+    except InvalidCursor:
+        raise Http404("Cursor inválido")
     
-    # Agregar scores calculados dinámicamente a cada startup
+    # Scores y ranking materializados (los mismos valores que el orden)
     startups_with_scores = []
-    for startup in startups:
-        try:
-            print(f"Procesando startup: {startup.company_name}")
-            startup_data = {
-                'startup': startup,
-                'growth_score': 50,  # Valor fijo para pruebas
-                'heat_score': 75,    # Valor fijo para pruebas
-                'cb_rank': 100,      # Valor fijo para pruebas
-                'ranking_percentile': 80  # Valor fijo para pruebas
-            }
-            startups_with_scores.append(startup_data)
-            print(f"Startup procesada exitosamente: {startup.company_name}")
-        except Exception as e:
-            print(f"Error processing startup {startup.company_name}: {str(e)}")
-            startup_data = {
-                'startup': startup,
-                'growth_score': 0,
-                'heat_score': 0,
-                'cb_rank': 999,
-                'ranking_percentile': 0
-            }
-            startups_with_scores.append(startup_data)
-    
-    # Ordenar por Growth Score descendente por defecto
-    sort_by = request.GET.get('sort', 'growth_score')
-    reverse = request.GET.get('order', 'desc') == 'desc'
+    for startup in page:
+        score = getattr(startup, 'score', None)
+        startups_with_scores.append({
+            'startup': startup,
+            'growth_score': score.growth_score if score else 0,
+            'heat_score': score.heat_score if score else 0,
+            'cb_rank': score.cb_rank if score else None,
+            'ranking_percentile': score.ranking_percentile if score and score.cb_rank else None
+        })
     
-    if sort_by == 'growth_score':
-        startups_with_scores.sort(key=lambda x: x['growth_score'], reverse=reverse)
-    elif sort_by == 'heat_score':
-        startups_with_scores.sort(key=lambda x: x['heat_score'], reverse=reverse)
-    elif sort_by == 'cb_rank':
-        startups_with_scores.sort(key=lambda x: x['cb_rank'], reverse=not reverse)  # Rank más bajo = mejor
-    elif sort_by == 'funding':
-        startups_with_scores.sort(key=lambda x: x['startup'].total_funding_raised or 0, reverse=reverse)
+    # Query string sin el cursor, para construir los enlaces de página
+    params = request.GET.copy()
+    params.pop('cursor', None)
     
-    context = {
+    return {
         'startups_with_scores': startups_with_scores,
+        'page': page,
+        'page_query': params.urlencode(),
         'search_query': search_query,
+        'facet_filters': facet_filters,
         'sort_by': sort_by,
-        'order': request.GET.get('order', 'desc')
+        'order': order,
     }
-    
+
+
+def _startup_facet_groups(request, facet_filters, search_query):
+    """Conteos cacheados de facetas con el enlace para activar/quitar cada opción"""
+    facet_counts = get_facet_counts(facet_filters, search_query)
+    titles = {
+        'industry': 'Industria',
+        'stage': 'Etapa',
+        'revenue_stage': 'Ingresos',
+        'is_fundraising': 'Fundraising',
+    }
+    groups = []
+    for name, options in facet_counts['facets'].items():
+        for option in options:
+            value = option['value']
+            if name == 'is_fundraising':
+                value = '1' if value else '0'
+            params = request.GET.copy()
+            params.pop('cursor', None)
+            option['selected'] = facet_filters.get(name) == option['value']
+            if option['selected']:
+                params.pop(name, None)
+            else:
+                params[name] = value
+            option['query'] = params.urlencode()
+        if options:
+            groups.append({'name': name, 'title': titles[name], 'options': options})
+    return facet_counts['total'], groups
+
+
+def startup_directory(request):
+    """Directorio público de startups paginado por cursor"""
+    context = _startup_directory_page(request)
+    context['facet_total'], context['facet_groups'] = _startup_facet_groups(
+        request, context['facet_filters'], context['search_query']
+    )
     return render(request, 'core/startup_directory.html', context)
 
-def investor_directory(request):
-    """Directorio público de inversores"""
-    investors = InvestorProfile.objects.filter(is_active=True).order_by('-created_at')
-    print(f"DEBUG: Total inversores encontrados: {investors.count()}")
-    for inv in investors:
-        print(f"  - {inv.fund_name} (activo: {inv.is_active})")
+
+def startup_directory_page(request):
+    """Fragmento HTMX con la siguiente página del directorio (scroll infinito)"""
+    context = _startup_directory_page(request)
+    return render(request, 'core/partials/startup_directory_items.html', context)
+
+def autocomplete_api(request):
+    """Sugerencias para los buscadores (índice de prefijos en memoria, sin queries)"""
+    query = request.GET.get('q', '').strip()
+    kinds = [kind for kind in request.GET.getlist('type') if kind in AUTOCOMPLETE_KINDS] or None
+    try:
+        limit = int(request.GET.get('limit', AUTOCOMPLETE_DEFAULT_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_DEFAULT_LIMIT
     
-    # Filtros básicos
-    search_query = request.GET.get('search')
+    results = autocomplete(query, limit=limit, kinds=kinds) if query else []
+    return JsonResponse({'query': query, 'results': results})
+
+@login_required
+def query_stats_api(request):
+    """Estadísticas móviles de queries por vista (solo staff)"""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    if request.method == 'POST' and request.POST.get('reset'):
+        query_stats.reset()
+    return JsonResponse({'window': query_stats.window, 'views': query_stats.snapshot()})
+
+INVESTOR_DIRECTORY_PAGE_SIZE = 24
+
+
+def _parse_amount(value):
+    """Monto de ticket desde el query string (None si no es válido)"""
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError):
+        return None
+    return amount if amount.is_finite() and amount >= 0 else None
+
+
+def _investor_directory_page(request):
+    """Arma una página (keyset) del directorio de inversores según los filtros del request"""
+    investors = InvestorProfile.objects.filter(is_active=True).select_related('user')
+    
+    # Filtros
+    investor_type = request.GET.get('investor_type')
+    if investor_type in dict(InvestorProfile.INVESTOR_TYPES):
+        investors = investors.filter(investor_type=investor_type)
+    else:
+        investor_type = ''
+    
+    geographic_focus = request.GET.get('geographic_focus')
+    if geographic_focus in dict(InvestorProfile.GEOGRAPHIC_FOCUS):
+        investors = investors.filter(geographic_focus=geographic_focus)
+    else:
+        geographic_focus = ''
+    
+    # Rango de ticket: el rango del inversor debe solaparse con el buscado
+    # (un mínimo o máximo vacío se considera abierto)
+    ticket_min = _parse_amount(request.GET.get('ticket_min'))
+    ticket_max = _parse_amount(request.GET.get('ticket_max'))
+    if ticket_min is not None:
+        investors = investors.filter(Q(max_investment__gte=ticket_min) | Q(max_investment__isnull=True))
+    if ticket_max is not None:
+        investors = investors.filter(Q(min_investment__lte=ticket_max) | Q(min_investment__isnull=True))
+    
+    # Búsqueda full-text (índice de inversores); search_rank es double
+    # precision en todos los motores, así vuelve igual en el cursor
+    search_query = request.GET.get('search', '').strip()
     if search_query:
-        investors = investors.filter(
-            Q(fund_name__icontains=search_query) |
-            Q(thesis__icontains=search_query) |
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(investor_type__icontains=search_query)
+        investors = search_investors(investors, search_query)
+        sort_field = 'search_rank'
+    else:
+        sort_field = 'created_at'
+    
+    try:
+        page = paginate_keyset(
+            investors, sort_field,
+            descending=True,
+            cursor=request.GET.get('cursor'),
+            page_size=INVESTOR_DIRECTORY_PAGE_SIZE,
+            key=f'investors:{sort_field}',
         )
-        print(f"DEBUG: Después del filtro de búsqueda: {investors.count()}")
+    except InvalidCursor:
+        raise Http404("Cursor inválido")
     
-    context = {
-        'investors': investors,
-        'search_query': search_query
-    }
+    params = request.GET.copy()
+    params.pop('cursor', None)
     
+    return {
+        'investors': page,
+        'page': page,
+        'page_query': params.urlencode(),
+        'search_query': search_query,
+        'investor_type': investor_type,
+        'geographic_focus': geographic_focus,
+        'ticket_min': ticket_min,
+        'ticket_max': ticket_max,
+        'investor_types': InvestorProfile.INVESTOR_TYPES,
+        'geographic_focus_choices': InvestorProfile.GEOGRAPHIC_FOCUS,
+    }
+
+
+def investor_directory(request):
+    """Directorio público de inversores paginado por cursor"""
+    context = _investor_directory_page(request)
     return render(request, 'core/investor_directory.html', context)
 
+
+def investor_directory_page(request):
+    """Fragmento HTMX con la siguiente página del directorio de inversores"""
+    context = _investor_directory_page(request)
+    return render(request, 'core/partials/investor_directory_items.html', context)
+
+
+def _amount_or_none(value):
+    return float(value) if value is not None else None
+
+
+def investor_directory_json(request):
+    """Variante JSON del directorio de inversores (mismos filtros y cursores)"""
+    context = _investor_directory_page(request)
+    page = context['page']
+    results = [
+        {
+            'id': investor.id,
+            'name': investor.user.get_full_name(),
+            'fund_name': investor.fund_name,
+            'investor_type': investor.investor_type,
+            'investor_type_display': investor.get_investor_type_display(),
+            'geographic_focus': investor.geographic_focus,
+            'min_investment': _amount_or_none(investor.min_investment),
+            'max_investment': _amount_or_none(investor.max_investment),
+            'fund_size': _amount_or_none(investor.fund_size),
+            'investment_stages': investor.investment_stages,
+            'thesis': investor.thesis[:200],
+            'url': reverse('core:investor_detail', args=[investor.id]),
+        }
+        for investor in page
+    ]
+    return JsonResponse({
+        'results': results,
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    })
+
 def startup_detail(request, startup_id):
     """Vista detallada de startup"""
     startup = get_object_or_404(Startup, id=startup_id, is_public=True)
@@ -1008,15 +1072,16 @@ def startup_profile(request, startup_id):
     if startup.founded_date:
         years_since_founded = round((timezone.now().date() - startup.founded_date).days / 365.25, 1)
     
-    # Calcular scores usando algoritmos dinámicos basados en datos reales
-    growth_score = startup.calculate_growth_score()  # Calculado basado en varios factores
-    heat_score = startup.calculate_heat_score()      # Basado en actividad, métricas, etc.
-    cb_rank = startup.calculate_cb_rank()           # Ranking global calculado
-    ranking_percentile = startup.get_ranking_percentile()  # Percentil del ranking
+    # Leer scores precalculados (StartupScore) en lugar de recalcularlos
+    score = get_startup_score(startup)
+    growth_score = score.growth_score
+    heat_score = score.heat_score
+    cb_rank = score.cb_rank
+    ranking_percentile = score.ranking_percentile
     
     # Obtener métricas adicionales de los nuevos métodos
-    performance_grade = startup.get_performance_grade()
-    market_position = startup.get_market_position()
+    performance_grade = startup.get_performance_grade(growth_score)
+    market_position = startup.get_market_position(ranking_percentile, cb_rank=cb_rank)
     formatted_funding = startup.format_funding_amount()
     formatted_revenue = startup.format_revenue_amount()
     
@@ -1940,7 +2005,9 @@ def delete_conversation(request, conversation_id):
 def get_conversations(request):
     """Obtener lista de conversaciones del usuario"""
     try:
-        conversations = ChatConversation.objects.filter(user=request.user).order_by('-updated_at')
+        conversations = ChatConversation.objects.filter(user=request.user).annotate(
+            messages_total=Count('messages')
+        ).order_by('-updated_at')
         
         conversations_data = [{
             'id': conv.id,
@@ -1948,7 +2015,7 @@ def get_conversations(request):
             'is_active': conv.is_active,
             'created_at': conv.created_at.isoformat(),
             'updated_at': conv.updated_at.isoformat(),
-            'messages_count': conv.messages.count()
+            'messages_count': conv.messages_total
         } for conv in conversations]
         
         return JsonResponse({
@@ -2089,18 +2156,23 @@ def messages_inbox(request):
         Q(participant1=request.user) | Q(participant2=request.user)
     ).select_related('participant1', 'participant2', 'participant1__profile', 'participant2__profile')
     
-    # Agregar info adicional a cada conversación
+    # Último mensaje y no leídos vienen denormalizados en la conversación (una sola query)
+    conversations = list(conversations)
+    other_users = [conv.get_other_participant(request.user) for conv in conversations]
+    # Presencia de todos los contactos en una sola consulta al registro
+    online_ids = online_user_ids([other.id for other in other_users])
     conversations_data = []
-    for conv in conversations:
-        other_user = conv.get_other_participant(request.user)
-        unread_count = conv.get_unread_count(request.user)
-        last_message = conv.messages.last()
-        
+    for conv, other_user in zip(conversations, other_users):
         conversations_data.append({
             'conversation': conv,
             'other_user': other_user,
-            'unread_count': unread_count,
-            'last_message': last_message,
+            'is_online': other_user.id in online_ids,
+            'unread_count': conv.get_unread_count(request.user),
+            'last_message': {
+                'content': conv.last_message_preview,
+                'created_at': conv.last_message_at,
+                'is_own': conv.last_message_sender_id == request.user.id,
+            } if conv.last_message_id else None,
         })
     
     context = {
@@ -2110,20 +2182,82 @@ def messages_inbox(request):
     return render(request, 'core/messages_inbox.html', context)
 
 
-@login_required
-def conversation_detail(request, conversation_id):
-    """Vista de una conversación específica"""
-    conversation = get_object_or_404(
+MESSAGE_HISTORY_PAGE_SIZE = 30
+
+
+def _message_history_page(conversation, cursor=None, page_size=MESSAGE_HISTORY_PAGE_SIZE):
+    """
+    Ventana de mensajes por cursor usando el índice (conversation, created_at),
+    con el id como desempate. Recorre del más nuevo al más antiguo y devuelve
+    los items en orden cronológico; next_cursor apunta a la ventana anterior.
+    """
+    try:
+        page = paginate_keyset(
+            conversation.messages.select_related('sender', 'sender__profile'),
+            'created_at',
+            descending=True,
+            cursor=cursor,
+            page_size=page_size,
+            key=f'messages:{conversation.pk}',
+        )
+    except InvalidCursor:
+        raise Http404("Cursor inválido")
+    page.items.reverse()
+    return page
+
+
+def _user_conversation(request, conversation_id):
+    return get_object_or_404(
         Conversation,
         Q(participant1=request.user) | Q(participant2=request.user),
         id=conversation_id
     )
+
+
+@login_required
+def conversation_history(request, conversation_id):
+    """Ventana anterior de mensajes (fragmento HTMX para el scroll hacia arriba)"""
+    conversation = _user_conversation(request, conversation_id)
+    page = _message_history_page(conversation, request.GET.get('cursor'))
+    return render(request, 'core/partials/message_items.html', {
+        'conversation': conversation,
+        'messages': page.items,
+        'history_cursor': page.next_cursor,
+    })
+
+
+@login_required
+def conversation_history_json(request, conversation_id):
+    """Variante JSON del historial de mensajes (mismos cursores)"""
+    conversation = _user_conversation(request, conversation_id)
+    page = _message_history_page(conversation, request.GET.get('cursor'))
+    results = [
+        {
+            'id': message.id,
+            'sender_id': message.sender_id,
+            'sender_name': message.sender.get_full_name(),
+            'content': message.content,
+            'is_read': message.is_read,
+            'created_at': message.created_at.isoformat(),
+        }
+        for message in page
+    ]
+    return JsonResponse({
+        'results': results,
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+def conversation_detail(request, conversation_id):
+    """Vista de una conversación específica"""
+    conversation = _user_conversation(request, conversation_id)
     
     # Marcar como leída
     conversation.mark_as_read(request.user)
     
-    # Obtener mensajes
-    messages_list = conversation.messages.select_related('sender')
+    # Solo la ventana más reciente; los anteriores se piden por cursor (conversation_history)
+    history_page = _message_history_page(conversation)
     
     # NUEVO: Obtener solicitudes de videollamada pendientes para este usuario
     from .models import MeetRequest
@@ -2149,7 +2283,8 @@ def conversation_detail(request, conversation_id):
     
     context = {
         'conversation': conversation,
-        'messages': messages_list,
+        'messages': history_page.items,
+        'history_cursor': history_page.next_cursor,
         'other_user': other_user,
         'pending_meet_requests': pending_meet_requests,  # NUEVO
     }
@@ -2164,18 +2299,24 @@ def my_connections(request):
     accepted_connections = ConnectionRequest.objects.filter(
         Q(sender=request.user) | Q(receiver=request.user),
         status='accepted'
-    ).select_related('sender', 'receiver', 'sender__profile', 'receiver__profile')
+    ).select_related(
+        'sender', 'receiver', 'sender__profile', 'receiver__profile',
+        'sender__investorprofile', 'receiver__investorprofile',
+    )
+    
+    # Conversaciones del usuario en una sola query, por id del otro participante
+    conversations_by_user = {}
+    for conversation in Conversation.objects.filter(
+        Q(participant1=request.user) | Q(participant2=request.user)
+    ).order_by('updated_at'):
+        other_id = conversation.participant2_id if conversation.participant1_id == request.user.id else conversation.participant1_id
+        conversations_by_user[other_id] = conversation
     
     # Extraer los usuarios conectados
     connections = []
     for conn in accepted_connections:
-        other_user = conn.receiver if conn.sender == request.user else conn.sender
-        
-        # Verificar si hay conversación
-        conversation = Conversation.objects.filter(
-            Q(participant1=request.user, participant2=other_user) |
-            Q(participant1=other_user, participant2=request.user)
-        ).first()
+        other_user = conn.receiver if conn.sender_id == request.user.id else conn.sender
+        conversation = conversations_by_user.get(other_user.id)
         
         connections.append({
             'user': other_user,
@@ -2183,6 +2324,10 @@ def my_connections(request):
             'conversation': conversation,
         })
     
+    online_ids = online_user_ids([conn_data['user'].id for conn_data in connections])
+    for conn_data in connections:
+        conn_data['is_online'] = conn_data['user'].id in online_ids
+    
     context = {
         'connections': connections,
     }
@@ -2232,7 +2377,8 @@ def delete_notification(request, notification_id):
 @require_POST
 def mark_all_notifications_read(request):
     """Marcar todas las notificaciones como leídas"""
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    record_read(request.user.id, None, -updated)
     
     return JsonResponse({'success': True})
 
@@ -2348,10 +2494,11 @@ def create_meet_link(request, conversation_id):
         )
         
         # Crear notificación en base de datos
-        Notification.objects.create(
-            user=other_participant,
+        notify(
+            other_participant,
+            f'{request.user.get_full_name()} ha solicitado una videollamada de Google Meet',
             conversation=conversation,
-            content=f'{request.user.get_full_name()} ha solicitado una videollamada de Google Meet'
+            kind='meet_request',
         )
         
         return JsonResponse({
@@ -2449,10 +2596,11 @@ def create_meet_link(request, conversation_id):
         conversation.save()
         
         # Crear notificación para el otro participante
-        Notification.objects.create(
-            user=other_participant,
+        notify(
+            other_participant,
+            f'{request.user.get_full_name()} ha iniciado una videollamada',
             conversation=conversation,
-            content=f'{request.user.get_full_name()} ha iniciado una videollamada'
+            kind='meet_started',
         )
         
         # Enviar notificación WebSocket en tiempo real
@@ -2799,10 +2947,11 @@ def accept_meet_request(request, request_id):
         )
         
         # Crear notificación para el solicitante
-        Notification.objects.create(
-            user=requester,
+        notify(
+            requester,
+            f'{request.user.get_full_name()} ha aceptado tu solicitud de videollamada',
             conversation=conversation,
-            content=f'{request.user.get_full_name()} ha aceptado tu solicitud de videollamada'
+            kind='meet_accepted',
         )
         
         return JsonResponse({
@@ -2858,10 +3007,11 @@ def reject_meet_request(request, request_id):
         )
         
         # Crear notificación para el solicitante
-        Notification.objects.create(
-            user=requester,
+        notify(
+            requester,
+            f'{request.user.get_full_name()} ha rechazado tu solicitud de videollamada',
             conversation=conversation,
-            content=f'{request.user.get_full_name()} ha rechazado tu solicitud de videollamada'
+            kind='meet_rejected',
         )
         
         return JsonResponse({
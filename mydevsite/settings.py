@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Para servir archivos estáticos
+    'core.query_budget.QueryBudgetMiddleware',  # Conteo de queries y tiempo SQL por vista
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -158,6 +159,22 @@ else:
     # Para desarrollo, usar el storage por defecto
     STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
+# Presupuestos de queries por vista (core.query_budget). El middleware envuelve
+# cada query: activo por defecto solo en desarrollo; en CI lo verifican los tests
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', str(DEBUG)) == 'True'
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', 50))
+QUERY_BUDGET_SQL_MS = int(os.getenv('QUERY_BUDGET_SQL_MS', 500))
+QUERY_STATS_WINDOW = 200
+QUERY_BUDGETS = {
+    'core:home': 20,
+    'core:dashboard': 10,
+    'core:dashboard_panel': 15,
+    'core:startup_profile': 25,
+    'core:messages_inbox': 15,
+    'core:get_conversations': 15,
+    'core:my_connections': 15,
+}
+
 # Logging configuration for debugging
 LOGGING = {
     'version': 1,
@@ -217,3 +234,34 @@ else:
             'BACKEND': 'channels.layers.InMemoryChannelLayer'
         }
     }
+
+# Cache compartido entre workers: el contador de notificaciones no leídas se
+# mantiene por deltas (cache.incr) y la versión de facetas y el snapshot de
+# estadísticas se invalidan por clave; con un LocMemCache por proceso cada
+# worker de gunicorn vería su propia copia desactualizada. Sin REDIS_URL
+# (desarrollo, un solo proceso) se usa el LocMemCache por defecto.
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'startupconnect',
+        }
+    }
+
+# Escritura diferida de mensajes del chat (core.chat_persistence)
+CHAT_FLUSH_INTERVAL = float(os.getenv('CHAT_FLUSH_INTERVAL', 0.25))  # segundos
+CHAT_FLUSH_BATCH_SIZE = int(os.getenv('CHAT_FLUSH_BATCH_SIZE', 200))
+CHAT_FLUSH_MAX_FAILURES = int(os.getenv('CHAT_FLUSH_MAX_FAILURES', 3))  # luego se reintenta mensaje por mensaje
+CHAT_MAX_PENDING = int(os.getenv('CHAT_MAX_PENDING', 5000))  # tope del buffer (backpressure)
+
+# Indicador de escritura: una transición publicada por ventana; sin refresco se apaga tras el TTL
+CHAT_TYPING_WINDOW = float(os.getenv('CHAT_TYPING_WINDOW', 1.0))  # segundos
+CHAT_TYPING_TTL = float(os.getenv('CHAT_TYPING_TTL', 6.0))  # segundos
+
+# Presencia online (core.presence_service): una conexión sin heartbeat vence a los PRESENCE_TTL segundos
+PRESENCE_TTL = int(os.getenv('PRESENCE_TTL', 60))
+
+# Contador cacheado de notificaciones no leídas: se reconcilia con la base al expirar.
+# Requiere un cache compartido (CACHES con Redis) cuando hay más de un worker
+NOTIFICATION_UNREAD_TTL = int(os.getenv('NOTIFICATION_UNREAD_TTL', 60 * 15))  # segundos